@@ -0,0 +1,223 @@
+"""
+A local stand-in for the parts of the Sentry API used by Zentry.
+
+Serves the `/organizations/{org}/events/`, `/organizations/{org}/events-stats/`
+and `/projects/{org}/{id}/` endpoints with random data, a configurable latency, payload size and error rate.
+Like Sentry, it can enforce a rate limit (`--rate-limit`), sends rate limit headers
+and paginates events with cursors in the Link header.
+Counts all calls it receives, see `/_stats`.
+
+Run it standalone with:
+
+    python benchmarks/fake_sentry.py --port 8999 --latency 0.2
+
+and point Zentry to it with `SENTRY_API_BASE_URL=http://localhost:8999/api/0`.
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import random
+import time
+
+from aiohttp import web
+
+
+def _value(field):
+    # Rates and scores are between 0 and 1, everything else is a duration or size.
+    if "rate" in field or "score" in field or "apdex" in field:
+        return random.random()
+
+    return random.uniform(1, 2000)
+
+
+def _row(fields, index):
+    row = {}
+    for field in fields:
+        if field == "span.description":
+            row[field] = f"SELECT * FROM table_{index} WHERE id = %s ORDER BY id LIMIT %s"
+        elif field == "transaction":
+            row[field] = f"/api/endpoint/{index}/"
+        elif field in ("project", "project.id"):
+            row[field] = 1
+        else:
+            row[field] = _value(field)
+
+    return row
+
+
+class FakeSentry:
+    """
+    Configuration and call counters of the fake Sentry API.
+    """
+
+    def __init__(
+        self,
+        latency=0.1,
+        jitter=0.0,
+        rows=5,
+        total_rows=100,
+        padding=0,
+        error_rate=0.0,
+        rate_limit=0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rows = rows
+        self.total_rows = total_rows
+        self.padding = padding
+        self.error_rate = error_rate
+        # Allowed calls per second, 0 means no limit
+        self.rate_limit = rate_limit
+        self.calls = collections.Counter()
+        self.window = 0
+        self.window_calls = 0
+
+    def _rate_limit_headers(self):
+        if not self.rate_limit:
+            return {}
+
+        # Windows of one second, like a (very strict) Sentry rate limit
+        window = int(time.time())
+        if window != self.window:
+            self.window = window
+            self.window_calls = 0
+
+        self.window_calls += 1
+        headers = {
+            "X-Sentry-Rate-Limit-Limit": str(self.rate_limit),
+            "X-Sentry-Rate-Limit-Remaining": str(
+                max(0, self.rate_limit - self.window_calls)
+            ),
+            "X-Sentry-Rate-Limit-Reset": str(window + 1),
+        }
+        if self.window_calls > self.rate_limit:
+            self.calls["rate_limited"] += 1
+            raise web.HTTPTooManyRequests(
+                text='{"detail": "Rate limit exceeded"}',
+                headers={**headers, "Retry-After": "1"},
+            )
+
+        return headers
+
+    async def _simulate(self, endpoint):
+        self.calls[endpoint] += 1
+        headers = self._rate_limit_headers()
+        await asyncio.sleep(max(0, self.latency + random.uniform(-1, 1) * self.jitter))
+
+        if random.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable(text='{"detail": "Injected error"}')
+
+        return headers
+
+    async def events(self, request):
+        headers = await self._simulate("events")
+
+        fields = request.query.getall("field", [])
+        per_page = min(int(request.query.get("per_page", self.rows)), self.rows)
+        # Cursors look like the ones of Sentry: "0:<offset>:<is_prev>"
+        offset = int(request.query.get("cursor", "0:0:0").split(":")[1])
+        end = min(offset + per_page, self.total_rows)
+        rows = [_row(fields, index) for index in range(offset, end)]
+
+        previous_offset = max(0, offset - per_page)
+        headers["Link"] = (
+            f'<{request.url}>; rel="previous"; results="{str(offset > 0).lower()}"; cursor="0:{previous_offset}:1", '
+            f'<{request.url}>; rel="next"; results="{str(end < self.total_rows).lower()}"; cursor="0:{end}:0"'
+        )
+
+        return web.json_response(
+            {
+                "data": rows,
+                "meta": {"fields": {}, "padding": "x" * self.padding},
+            },
+            headers=headers,
+        )
+
+    async def events_stats(self, request):
+        headers = await self._simulate("events-stats")
+
+        start = datetime.datetime.fromisoformat(request.query["start"])
+        end = datetime.datetime.fromisoformat(request.query["end"])
+        timestamps = range(int(start.timestamp()), int(end.timestamp()), 24 * 60 * 60)
+
+        # One series per field, with one value per day
+        series = {}
+        for field in request.query.getall("yAxis", []):
+            data = []
+            for timestamp in timestamps:
+                if field == "count()":
+                    value = random.randint(1, 10000)
+                else:
+                    value = _value(field)
+                data.append([timestamp, [{"count": value}]])
+
+            series[field] = {"data": data, "order": len(series)}
+
+        return web.json_response(series, headers=headers)
+
+    async def project(self, request):
+        headers = await self._simulate("projects")
+
+        org_slug = request.match_info["org_slug"]
+        return web.json_response(
+            {
+                "id": request.match_info["project_id"],
+                "organization": {
+                    "slug": org_slug,
+                    "name": org_slug.title(),
+                    "links": {"organizationUrl": f"https://{org_slug}.sentry.io"},
+                },
+            },
+            headers=headers,
+        )
+
+    async def stats(self, request):
+        return web.json_response(dict(self.calls, total=sum(self.calls.values())))
+
+    async def reset(self, request):
+        self.calls.clear()
+        return web.json_response({})
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get("/api/0/organizations/{org_slug}/events/", self.events)
+        app.router.add_get(
+            "/api/0/organizations/{org_slug}/events-stats/", self.events_stats
+        )
+        app.router.add_get("/api/0/projects/{org_slug}/{project_id}/", self.project)
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_post("/_reset", self.reset)
+        return app
+
+
+def add_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of latency")
+    parser.add_argument("--rows", type=int, default=5, help="Max rows per events call")
+    parser.add_argument("--total-rows", type=int, default=100, help="Rows of all pages of events")
+    parser.add_argument("--padding", type=int, default=0, help="Extra bytes per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failing calls")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Allowed calls per second (0: no limit)")
+
+
+def from_arguments(args):
+    return FakeSentry(
+        latency=args.latency,
+        jitter=args.jitter,
+        rows=args.rows,
+        total_rows=args.total_rows,
+        padding=args.padding,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8999)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    web.run_app(from_arguments(args).make_app(), port=args.port)
@@ -0,0 +1,245 @@
+"""
+End-to-end benchmark of Zentry against a local fake Sentry API.
+
+Starts the fake Sentry API (see `fake_sentry.py`) and Zentry, then measures:
+
+- cold and warm page loads (the index page plus all cards streamed from /status/stream)
+- latency percentiles of every /status/* route
+- throughput of page loads with N concurrent viewers
+- the number of calls Zentry made to the (fake) Sentry API
+
+Needs a running Redis server (`ZENTRY_REDIS_URL`, default: "redis://localhost:6379").
+Every run uses its own referrer and snapshot file, so it never reuses results cached by an earlier run.
+
+Usage:
+
+    python benchmarks/run.py --viewers 20 --duration 30 --output results.json
+
+The results are printed (and written to `--output`) as JSON, so they can be compared between releases.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+import fake_sentry
+
+ZENTRY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "zentry")
+
+ROUTES = [
+    "/status/frontend_requests",
+    "/status/backend_requests",
+    "/status/frontend",
+    "/status/backend",
+    "/status/caches",
+    "/status/queues",
+    "/status/database",
+]
+
+
+def _percentiles(durations):
+    if not durations:
+        return {}
+
+    durations = sorted(durations)
+    if len(durations) == 1:
+        quantiles = durations * 99
+    else:
+        quantiles = statistics.quantiles(durations, n=100, method="inclusive")
+
+    return {
+        "count": len(durations),
+        "min": durations[0],
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+        "max": durations[-1],
+    }
+
+
+async def _upstream_calls(session, sentry_url):
+    async with session.get(f"{sentry_url}/_stats") as response:
+        return await response.json()
+
+
+async def _reset_upstream_calls(session, sentry_url):
+    async with session.post(f"{sentry_url}/_reset") as response:
+        await response.read()
+
+
+async def _get(session, url):
+    start = time.perf_counter()
+    async with session.get(url) as response:
+        await response.read()
+        response.raise_for_status()
+
+    return time.perf_counter() - start
+
+
+async def _page_load(session, zentry_url):
+    """
+    Load the dashboard like a browser does: the index page and the stream of all cards.
+    """
+    start = time.perf_counter()
+    await _get(session, f"{zentry_url}/")
+    await _get(session, f"{zentry_url}/status/stream")
+    return time.perf_counter() - start
+
+
+async def _wait_until_ready(session, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status < 500:
+                    return
+        except aiohttp.ClientError:
+            pass
+
+        await asyncio.sleep(0.2)
+
+    raise RuntimeError(f"{url} did not become ready within {timeout} seconds")
+
+
+async def _viewer(session, zentry_url, deadline, durations, errors):
+    while time.monotonic() < deadline:
+        try:
+            durations.append(await _page_load(session, zentry_url))
+        except aiohttp.ClientError:
+            errors.append(1)
+
+
+async def benchmark(args):
+    sentry = fake_sentry.from_arguments(args)
+    runner = web.AppRunner(sentry.make_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.sentry_port).start()
+    sentry_url = f"http://127.0.0.1:{args.sentry_port}"
+    zentry_url = f"http://127.0.0.1:{args.port}"
+
+    # Zentry's snapshot of the last known results would make the cold page load warm
+    snapshot_dir = tempfile.TemporaryDirectory()
+
+    env = {
+        **os.environ,
+        "SENTRY_API_BASE_URL": f"{sentry_url}/api/0",
+        "SENTRY_API_AUTH_TOKEN": "benchmark",
+        "SENTRY_ORG_SLUG": "benchmark",
+        "SENTRY_FRONTEND_PROJECT_ID": "1",
+        "SENTRY_FRONTEND_ENVIRONMENT": "production",
+        "SENTRY_BACKEND_PROJECT_ID": "2",
+        "SENTRY_BACKEND_ENVIRONMENT": "production",
+        "SENTRY_DSN": "",
+        # A new referrer results in new cache keys, so every run starts with a cold cache
+        "REFERRER": f"zentry-benchmark-{uuid.uuid4().hex}",
+        "ZENTRY_SNAPSHOT_PATH": os.path.join(snapshot_dir.name, "snapshot.sqlite3"),
+    }
+    if not args.background_refresh:
+        env["ZENTRY_REFRESH_ENABLED"] = "0"
+
+    zentry = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port)],
+        cwd=ZENTRY_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    results = {
+        "python": platform.python_version(),
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+    }
+
+    try:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await _wait_until_ready(session, f"{zentry_url}/")
+            results["upstream_calls_startup"] = await _upstream_calls(session, sentry_url)
+
+            # Cold page load: nothing is cached yet (besides what was loaded on startup)
+            await _reset_upstream_calls(session, sentry_url)
+            results["cold_page_load"] = await _page_load(session, zentry_url)
+            results["upstream_calls_cold_page_load"] = await _upstream_calls(
+                session, sentry_url
+            )
+
+            # Warm page loads
+            await _reset_upstream_calls(session, sentry_url)
+            warm = [
+                await _page_load(session, zentry_url) for _ in range(args.iterations)
+            ]
+            results["warm_page_load"] = _percentiles(warm)
+            results["upstream_calls_warm_page_loads"] = await _upstream_calls(
+                session, sentry_url
+            )
+
+            # Every route on its own
+            results["routes"] = {}
+            for route in ROUTES:
+                durations = [
+                    await _get(session, f"{zentry_url}{route}")
+                    for _ in range(args.iterations)
+                ]
+                results["routes"][route] = _percentiles(durations)
+
+            # Concurrent viewers
+            await _reset_upstream_calls(session, sentry_url)
+            durations = []
+            errors = []
+            deadline = time.monotonic() + args.duration
+            await asyncio.gather(
+                *[
+                    _viewer(session, zentry_url, deadline, durations, errors)
+                    for _ in range(args.viewers)
+                ]
+            )
+            results["concurrent_page_loads"] = {
+                **_percentiles(durations),
+                "viewers": args.viewers,
+                "errors": len(errors),
+                "page_loads_per_second": len(durations) / args.duration,
+            }
+            results["upstream_calls_concurrent"] = await _upstream_calls(
+                session, sentry_url
+            )
+    finally:
+        zentry.terminate()
+        zentry.wait()
+        await runner.cleanup()
+        snapshot_dir.cleanup()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=5101, help="Port for Zentry")
+    parser.add_argument("--sentry-port", type=int, default=8999, help="Port for the fake Sentry API")
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per warm measurement")
+    parser.add_argument("--viewers", type=int, default=10, help="Concurrent viewers")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run the concurrent viewers")
+    parser.add_argument("--background-refresh", action="store_true", help="Keep the background refresh enabled")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    fake_sentry.add_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
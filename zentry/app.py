@@ -1,5 +1,12 @@
+import asyncio
 import os
+import urllib.parse
 from fasthtml.common import *
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.middleware import Middleware
+import metrics
+import profiling
+import refresher
 import sentry_api
 import sentry_sdk
 
@@ -14,6 +21,7 @@ from components import (
     header,
     queues_status,
 )
+from routes.debug import debug_app
 from routes.status import status_app
 
 sentry_sdk.init(
@@ -25,7 +33,7 @@ sentry_sdk.init(
 headers = (
     Link(rel="stylesheet", href="assets/reset.css", type="text/css"),
     Link(rel="stylesheet", href="assets/zentry.css", type="text/css"),
-    MarkdownJS(),
+    Script(src="https://cdn.jsdelivr.net/npm/htmx-ext-sse@2.2.2/sse.js"),
     Link(
         rel="icon",
         type="image/png",
@@ -33,34 +41,142 @@ headers = (
     ),
 )
 
-routes = [Mount("/status", status_app, name="status")]
+routes = [
+    Mount("/status", status_app, name="status"),
+    # Profiling, only available with ZENTRY_PROFILING_TOKEN
+    Mount("/debug", debug_app, name="debug"),
+]
+
+
+async def lifespan(app):
+    await sentry_api.init()
+    refresher.start()
+    yield
+    await refresher.stop()
+    await sentry_api.close()
 
 
 app, rt = fast_app(
     pico=False,
     hdrs=headers,
     routes=routes,
+    lifespan=lifespan,
+    middleware=[Middleware(profiling.ProfileRequestMiddleware)],
 )
 
 
+def tagline():
+    if sentry_api.TIME_PERIOD_IN_DAYS == 1:
+        return Div(f"Today (until now), compared to yesterday.", cls="tagline")
+
+    return Div(
+        f"The last {sentry_api.TIME_PERIOD_IN_DAYS} days, compared to the {sentry_api.TIME_PERIOD_IN_DAYS} days before.",
+        cls="tagline",
+    )
+
+
 @app.get("/")
 async def index():
-    # TODO: Check if there is a FastHTML hook on startup so this is only called on startup.
-    await sentry_api.init()
+    # With more than one project pair, start with the overview of all of them
+    if len(sentry_api.PROJECT_PAIRS) > 1:
+        return await summary()
 
-    if sentry_api.TIME_PERIOD_IN_DAYS == 1:
-        tagline = Div(f"Today (until now), compared to yesterday.", cls="tagline")
-    else:
-        tagline = Div(
-            f"The last {sentry_api.TIME_PERIOD_IN_DAYS} days, compared to the {sentry_api.TIME_PERIOD_IN_DAYS} days before.",
-            cls="tagline",
+    return await dashboard()
+
+
+@app.get("/pairs/{pair}")
+async def pair_dashboard(pair: str):
+    if pair not in sentry_api.PROJECT_PAIRS:
+        return Response("Unknown project pair", status_code=404)
+
+    return await dashboard(pair)
+
+
+@app.get("/summary")
+async def summary():
+    pairs = sorted(
+        sentry_api.PROJECT_PAIRS.values(), key=lambda pair: pair["priority"]
+    )
+
+    # A pair whose projects can not be loaded is shown as unavailable, the others are shown anyway
+    pairs_org_data = await asyncio.gather(
+        *[sentry_api.ensure_org_data(pair["name"]) for pair in pairs],
+        return_exceptions=True,
+    )
+
+    rows = []
+    for pair, org_data in zip(pairs, pairs_org_data):
+        if isinstance(org_data, Exception):
+            sentry_api.capture_exception(org_data)
+            rows.append(
+                Div(
+                    H2(pair["name"]),
+                    Div(
+                        "The projects of this pair could not be loaded from Sentry.",
+                        cls="summary-unavailable",
+                    ),
+                    cls="summary-pair",
+                )
+            )
+            continue
+
+        rows.append(
+            Div(
+                H2(
+                    A(
+                        pair["name"],
+                        href=f"/pairs/{urllib.parse.quote(pair['name'], safe='')}",
+                    )
+                ),
+                Div(
+                    await frontend_status(org_data=org_data, loading=True),
+                    await backend_status(org_data=org_data, loading=True),
+                    cls="summary-cards",
+                ),
+                cls="summary-pair",
+            )
         )
 
+    # All pairs belong to the same organization
+    org_names = [
+        org_data["name"]
+        for org_data in pairs_org_data
+        if not isinstance(org_data, Exception)
+    ]
+    org_name = org_names[0] if org_names else sentry_api.ORG_SLUG
+
+    return Title("Zentry"), Div(
+        header(),
+        Div(
+            H1(org_name),
+            tagline(),
+        ),
+        Div(
+            *rows,
+            # The cards of all pairs are streamed in one request, see `routes/status.py`
+            hx_ext="sse",
+            sse_connect="/status/stream?summary=1",
+            sse_close="done",
+            cls="summary-wrapper",
+        ),
+        footer(),
+        cls="wrapper",
+    )
+
+
+async def dashboard(pair=None):
+    org_data = await sentry_api.ensure_org_data(pair)
+
+    params = urllib.parse.urlencode({"pair": org_data["pair"]})
+    title = [org_data["name"]]
+    if len(sentry_api.PROJECT_PAIRS) > 1:
+        title = [A("All projects", href="/summary"), " / ", org_data["pair"]]
+
     return Title("Zentry"), Div(
         header(),
         Div(
-            H1(sentry_api.org_data["name"]),
-            tagline,
+            H1(*title),
+            tagline(),
         ),
         Div(
             # Left side of grid
@@ -69,7 +185,7 @@ async def index():
                     # Frontend Outbound Requests
                     Div(
                         await frontend_requests_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
@@ -79,7 +195,7 @@ async def index():
                     # Backend Outbound Requests
                     Div(
                         await backend_requests_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
@@ -93,7 +209,7 @@ async def index():
                     # Frontend
                     Div(
                         await frontend_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
@@ -101,7 +217,7 @@ async def index():
                     # Backend
                     Div(
                         await backend_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
@@ -113,14 +229,14 @@ async def index():
                     # Caches
                     Div(
                         await caches_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
                     # Queues
                     Div(
                         await queues_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
@@ -132,13 +248,17 @@ async def index():
                     # Database
                     Div(
                         await database_status(
-                            org_data=sentry_api.org_data,
+                            org_data=org_data,
                             loading=True,
                         ),
                     ),
                     cls="grid-right-single",
                 ),
             ),
+            # All cards are streamed in one request, see `routes/status.py`
+            hx_ext="sse",
+            sse_connect=f"/status/stream?{params}",
+            sse_close="done",
             cls="grid-wrapper",
         ),
         footer(),
@@ -146,4 +266,14 @@ async def index():
     )
 
 
-serve()
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.generate(), media_type=CONTENT_TYPE_LATEST)
+
+
+if __name__ == "__main__" and sentry_api.WORKERS > 1:
+    # Before the workers are started, so they all write their metrics to the same directory
+    metrics.prepare_multiprocess()
+
+# With more than one worker, reloading on code changes is not supported
+serve(reload=sentry_api.WORKERS == 1, workers=sentry_api.WORKERS)
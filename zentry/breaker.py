@@ -0,0 +1,84 @@
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of making a request while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops making requests to a failing service for a while.
+
+    After `failure_threshold` failed requests in a row the breaker opens, requests
+    that take longer than `slow_call_duration` seconds count as failed. While open,
+    no requests are made. After `reset_timeout` seconds the breaker is half open and
+    lets one trial request through: if it succeeds the breaker closes, otherwise it
+    opens again. A `failure_threshold` of 0 disables the breaker.
+    The number of times the breaker opened is counted.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, slow_call_duration):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_duration = slow_call_duration
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.opens = 0
+        self._trial_running = False
+
+    def allow(self):
+        """
+        Returns `True` if a request may be made now.
+
+        Every allowed request has to be followed by a call to `record_success()`,
+        `record_failure()` or `record_cancelled()`.
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+
+            self.state = HALF_OPEN
+
+        if self.state == HALF_OPEN:
+            # Only one trial request at a time
+            if self._trial_running:
+                return False
+
+            self._trial_running = True
+
+        return True
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opens += 1
+
+    def record_success(self, duration):
+        if duration >= self.slow_call_duration:
+            self.record_failure()
+            return
+
+        self._trial_running = False
+        self.failures = 0
+        self.state = CLOSED
+
+    def record_failure(self):
+        self._trial_running = False
+        self.failures += 1
+        # Requests started before the breaker opened may still fail afterwards
+        if self.failure_threshold <= 0 or self.state == OPEN:
+            return
+
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def record_cancelled(self):
+        # The request did not tell us anything, let the next one try
+        self._trial_running = False
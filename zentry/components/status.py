@@ -1,3 +1,6 @@
+import os
+import urllib.parse
+
 from fasthtml.common import *
 import sentry_api
 from components.ui import loading_placeholder, no_data, metric, metric_simple, query
@@ -8,6 +11,9 @@ from utils import (
     get_score,
 )
 
+# How many queries the database card shows at most, after loading more of them
+DATABASE_MAX_ROWS = int(os.environ.get("ZENTRY_DATABASE_MAX_ROWS", 50))
+
 
 async def frontend_status(org_data=None, loading=False):
     header = H2(
@@ -22,25 +28,26 @@ async def frontend_status(org_data=None, loading=False):
 
     # If desired, render loading state
     if loading:
-        return loading_placeholder(header, "/status/frontend")
+        return loading_placeholder(header, org_data["pair"], "frontend")
 
     # Load data
-    data = await sentry_api.get_frontend_status(
-        org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.FRONTEND_ID,
-        environment=sentry_api.FRONTEND_ENV,
-    )
-    data_prev = await sentry_api.get_frontend_status(
+    data, data_prev = await sentry_api.get_status_with_previous(
+        sentry_api.get_frontend_status,
         org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.FRONTEND_ID,
-        environment=sentry_api.FRONTEND_ENV,
-        preview_time_period=True,
+        project_id=org_data["frontend_id"],
+        environment=org_data["frontend_env"],
     )
 
     # If no data, render no data state
     if not data:
         return no_data(header)
 
+    # Without data for the previous time period no change is shown
+    data_prev = data_prev or {}
+
+    # The values of every day of the time period
+    trends = data.get("trends", {})
+
     # Render the frontend state
     return Div(
         header,
@@ -49,25 +56,28 @@ async def frontend_status(org_data=None, loading=False):
                 title="Time to First Byte",
                 id="ttfb",
                 value=data["ttfb"],
-                value_prev=data_prev["ttfb"],
+                value_prev=data_prev.get("ttfb"),
                 score=get_score("ttfb", data["ttfb"]),
                 formatter=fmt_duration,
+                trend=trends.get("ttfb"),
             ),
             metric(
                 title="First Contentful Paint",
                 id="fcp",
                 value=data["fcp"],
-                value_prev=data_prev["fcp"],
+                value_prev=data_prev.get("fcp"),
                 score=get_score("fcp", data["fcp"]),
                 formatter=fmt_duration,
+                trend=trends.get("fcp"),
             ),
             metric(
                 title="Interaction to Next Paint",
                 id="inp",
                 value=data["inp"],
-                value_prev=data_prev["inp"],
+                value_prev=data_prev.get("inp"),
                 score=get_score("inp", data["inp"]),
                 formatter=fmt_duration,
+                trend=trends.get("inp"),
             ),
             cls="body",
         ),
@@ -89,25 +99,26 @@ async def backend_status(org_data=None, loading=False):
 
     # If desired, render loading state
     if loading:
-        return loading_placeholder(header, "/status/backend")
+        return loading_placeholder(header, org_data["pair"], "backend")
 
     # Load data
-    data = await sentry_api.get_backend_status(
+    data, data_prev = await sentry_api.get_status_with_previous(
+        sentry_api.get_backend_status,
         org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.FRONTEND_ID,
-        environment=sentry_api.FRONTEND_ENV,
-    )
-    data_prev = await sentry_api.get_backend_status(
-        org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.FRONTEND_ID,
-        environment=sentry_api.FRONTEND_ENV,
-        preview_time_period=True,
+        project_id=org_data["frontend_id"],
+        environment=org_data["frontend_env"],
     )
 
     # If no data, render no data state
     if not data:
         return no_data(header)
 
+    # Without data for the previous time period no change is shown
+    data_prev = data_prev or {}
+
+    # The values of every day of the time period
+    trends = data.get("trends", {})
+
     # Render the backend state
     return Div(
         header,
@@ -116,17 +127,19 @@ async def backend_status(org_data=None, loading=False):
                 title="Failure Rate",
                 id="failure-rate",
                 value=data["failure_rate"],
-                value_prev=data_prev["failure_rate"],
+                value_prev=data_prev.get("failure_rate"),
                 score=get_score("backend_failure_rate", data["failure_rate"]),
                 formatter=fmt_percentage,
+                trend=trends.get("failure_rate"),
             ),
             metric(
                 title="Apdex",
                 id="apdex",
                 value=data["apdex"],
-                value_prev=data_prev["apdex"],
+                value_prev=data_prev.get("apdex"),
                 score=get_score("inverse_apdex", 1 - data["apdex"]),
                 formatter=fmt_round_2,
+                trend=trends.get("apdex"),
             ),
             cls="body",
         ),
@@ -146,46 +159,30 @@ async def requests_status(title, id, org_data=None, loading=False):
         ),
     )
 
-    is_frontend = "frontend" in id
-    if is_frontend:
-        route = "/status/frontend_requests"
+    if "frontend" in id:
+        card = "frontend_requests"
     else:
-        route = "/status/backend_requests"
+        card = "backend_requests"
 
     # If desired, render loading state
     if loading:
-        return loading_placeholder(header, route)
+        return loading_placeholder(header, org_data["pair"], card)
 
     # Load data
-    if is_frontend:
-        data = await sentry_api.get_requests_status(
-            org_slug=sentry_api.ORG_SLUG,
-            project_id=sentry_api.FRONTEND_ID,
-            environment=sentry_api.FRONTEND_ENV,
-        )
-        data_prev = await sentry_api.get_requests_status(
-            org_slug=sentry_api.ORG_SLUG,
-            project_id=sentry_api.FRONTEND_ID,
-            environment=sentry_api.FRONTEND_ENV,
-            preview_time_period=True,
-        )
-    else:
-        data = await sentry_api.get_requests_status(
-            org_slug=sentry_api.ORG_SLUG,
-            project_id=sentry_api.BACKEND_ID,
-            environment=sentry_api.BACKEND_ENV,
-        )
-        data_prev = await sentry_api.get_requests_status(
-            org_slug=sentry_api.ORG_SLUG,
-            project_id=sentry_api.BACKEND_ID,
-            environment=sentry_api.BACKEND_ENV,
-            preview_time_period=True,
-        )
+    data, data_prev = await sentry_api.get_status_with_previous(
+        sentry_api.get_requests_status,
+        org_slug=sentry_api.ORG_SLUG,
+        project_id=org_data["id"],
+        environment=org_data["env"],
+    )
 
     # If no data, render no data state
     if not data:
         return no_data(header)
 
+    # Without data for the previous time period no change is shown
+    data_prev = data_prev or {}
+
     # Render the requests state
     failure_rate = (
         data["response_rate_3xx"]
@@ -193,11 +190,24 @@ async def requests_status(title, id, org_data=None, loading=False):
         + data["response_rate_5xx"]
     )
 
-    failure_rate_prev = (
-        data_prev["response_rate_3xx"]
-        + data_prev["response_rate_4xx"]
-        + data_prev["response_rate_5xx"]
-    )
+    # The values of every day of the time period
+    trends = data.get("trends", {})
+    failure_rate_trend = [
+        None if None in rates else sum(rates)
+        for rates in zip(
+            trends.get("response_rate_3xx", []),
+            trends.get("response_rate_4xx", []),
+            trends.get("response_rate_5xx", []),
+        )
+    ]
+
+    failure_rate_prev = None
+    if data_prev:
+        failure_rate_prev = (
+            data_prev["response_rate_3xx"]
+            + data_prev["response_rate_4xx"]
+            + data_prev["response_rate_5xx"]
+        )
 
     return Div(
         header,
@@ -209,14 +219,16 @@ async def requests_status(title, id, org_data=None, loading=False):
                 value_prev=failure_rate_prev,
                 score=get_score("http_failure_rate", failure_rate),
                 formatter=fmt_percentage,
+                trend=failure_rate_trend,
             ),
             metric(
                 title="Avg Duration",
                 id="time_avg",
                 value=data["time_avg"],
-                value_prev=data_prev["time_avg"],
+                value_prev=data_prev.get("time_avg"),
                 score=get_score("http_avg_duration", data["time_avg"]),
                 formatter=fmt_duration,
+                trend=trends.get("time_avg"),
             ),
             cls="body",
         ),
@@ -229,7 +241,12 @@ async def frontend_requests_status(org_data=None, loading=False):
     return await requests_status(
         "Outbound API Requests",
         "frontend-outbound-requests",
-        {"url": org_data["frontend_url"], "id": org_data["frontend_id"]},
+        {
+            "pair": org_data["pair"],
+            "url": org_data["frontend_url"],
+            "id": org_data["frontend_id"],
+            "env": org_data["frontend_env"],
+        },
         loading=loading,
     )
 
@@ -238,7 +255,12 @@ async def backend_requests_status(org_data=None, loading=False):
     return await requests_status(
         "Outbound API Requests",
         "backend-outbound-requests",
-        {"url": org_data["backend_url"], "id": org_data["backend_id"]},
+        {
+            "pair": org_data["pair"],
+            "url": org_data["backend_url"],
+            "id": org_data["backend_id"],
+            "env": org_data["backend_env"],
+        },
         loading=loading,
     )
 
@@ -256,25 +278,23 @@ async def caches_status(org_data=None, loading=False):
 
     # If desired, render loading state
     if loading:
-        return loading_placeholder(header, "/status/caches")
+        return loading_placeholder(header, org_data["pair"], "caches")
 
     # Load data
-    data = await sentry_api.get_caches_status(
-        org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.BACKEND_ID,
-        environment=sentry_api.BACKEND_ENV,
-    )
-    data_prev = await sentry_api.get_caches_status(
+    data, data_prev = await sentry_api.get_status_with_previous(
+        sentry_api.get_caches_status,
         org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.BACKEND_ID,
-        environment=sentry_api.BACKEND_ENV,
-        preview_time_period=True,
+        project_id=org_data["backend_id"],
+        environment=org_data["backend_env"],
     )
 
     # If no data, render no data state
     if not data:
         return no_data(header)
 
+    # Without data for the previous time period no change is shown
+    data_prev = data_prev or {}
+
     # Render the caches state
     return Div(
         header,
@@ -282,10 +302,11 @@ async def caches_status(org_data=None, loading=False):
             title="Cache hit rate",
             id="cahe_hit_rate",
             value=1 - data["miss_rate"],
-            value_prev=1 - data_prev["miss_rate"],
+            value_prev=1 - data_prev["miss_rate"] if data_prev else None,
             score=get_score("cache_miss_rate", data["miss_rate"]),
             formatter=fmt_percentage,
         ),
+        breakdown_toggle("caches", org_data),
         id="cache",
     )
 
@@ -303,30 +324,29 @@ async def queues_status(org_data=None, loading=False):
 
     # If desired, render loading state
     if loading:
-        return loading_placeholder(header, "/status/queues")
+        return loading_placeholder(header, org_data["pair"], "queues")
 
     # Load data
-    data = await sentry_api.get_queues_status(
-        org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.BACKEND_ID,
-        environment=sentry_api.BACKEND_ENV,
-    )
-    data_prev = await sentry_api.get_queues_status(
+    data, data_prev = await sentry_api.get_status_with_previous(
+        sentry_api.get_queues_status,
         org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.BACKEND_ID,
-        environment=sentry_api.BACKEND_ENV,
-        preview_time_period=True,
+        project_id=org_data["backend_id"],
+        environment=org_data["backend_env"],
     )
 
     # If no data, render no data state
     if not data:
         return no_data(header)
 
+    # Without data for the previous time period no change is shown
+    data_prev = data_prev or {}
+
     # Render the queues state
     return Div(
         header,
         Div(
             # TODO: if we add this, the UI looks ugly, so disabling for now
+            # (it also needs "trace_status_rate(ok)" in `sentry_api.QUERIES["queues"]`)
             # metric(
             #     title="Failure Rate",
             #     id="queue_failure_rate",
@@ -339,7 +359,7 @@ async def queues_status(org_data=None, loading=False):
                 title="Avg Processing Time",
                 id="processing_time_avg",
                 value=data["processing_time_avg"],
-                value_prev=data_prev["processing_time_avg"],
+                value_prev=data_prev.get("processing_time_avg"),
                 score=get_score("queue_avg_processing", data["processing_time_avg"]),
                 formatter=fmt_duration,
             ),
@@ -347,12 +367,13 @@ async def queues_status(org_data=None, loading=False):
                 title="Avg Time in Queue",
                 id="time_in_queue_avg",
                 value=data["time_in_queue_avg"],
-                value_prev=data_prev["time_in_queue_avg"],
+                value_prev=data_prev.get("time_in_queue_avg"),
                 score=get_score("queue_avg_time_in_queue", data["time_in_queue_avg"]),
                 formatter=fmt_duration,
             ),
             cls="body",
         ),
+        breakdown_toggle("queues", org_data),
         id="queue",
         cls="card",
     )
@@ -370,22 +391,46 @@ async def database_status(org_data=None, loading=False):
     )
 
     if loading:
-        return loading_placeholder(header, "/status/database")
+        return loading_placeholder(header, org_data["pair"], "database")
 
-    # Load data
-    data = await sentry_api.get_database_status(
-        org_slug=sentry_api.ORG_SLUG,
-        project_id=sentry_api.BACKEND_ID,
-        environment=sentry_api.BACKEND_ENV,
+    # Load data, a failed call is shown as delayed or failed like on the other cards
+    (data,) = await sentry_api.gather_isolated(
+        sentry_api.get_database_status(
+            org_slug=sentry_api.ORG_SLUG,
+            project_id=org_data["backend_id"],
+            environment=org_data["backend_env"],
+        )
     )
 
     # If no data, render no data state
-    if len(data) == 0:
+    if not data:
         return no_data(header)
 
     # Render the database state
+    return Div(
+        header,
+        Div(
+            Div(
+                # Headline
+                Div("Query", cls="row-header"),
+                Div("Avg Duration", cls="row-header right"),
+                Div("Time Spent", cls="row-header right"),
+                # Queries
+                *_database_rows(data["rows"]),
+                _load_more_queries(org_data, data["next_cursor"], len(data["rows"])),
+                cls="grid-card-list",
+            ),
+            cls="body",
+        ),
+        id="database",
+        cls="card",
+        style="min-height: 400px; height: unset;",
+    )
+
+
+def _database_rows(rows):
     output = []
-    for item in data:
+    for item in rows:
         output += [
             query(
                 item["query"],
@@ -406,21 +451,123 @@ async def database_status(org_data=None, loading=False):
             ),
         ]
 
-    return Div(
-        header,
+    return output
+
+
+def _load_more_queries(org_data, cursor, shown, error=False):
+    """
+    Replaces itself with the next page of queries of the database card.
+
+    The next page is loaded in the background already, so it shows up right away.
+    """
+    if cursor is None or shown >= DATABASE_MAX_ROWS:
+        return None
+
+    sentry_api.prefetch(
+        sentry_api.get_database_status,
+        org_slug=sentry_api.ORG_SLUG,
+        project_id=org_data["backend_id"],
+        environment=org_data["backend_env"],
+        cursor=cursor,
+    )
+
+    params = urllib.parse.urlencode(
+        {"pair": org_data["pair"], "cursor": cursor, "shown": shown}
+    )
+    return Button(
+        "Could not load more queries, try again" if error else "Load more",
+        hx_get=f"/status/database/page?{params}",
+        hx_swap="outerHTML",
+        cls="load-more",
+    )
+
+
+async def database_page(org_data, cursor, shown):
+    """
+    The next page of queries of the database card, followed by the button to load even more.
+    """
+    try:
+        data = await sentry_api.get_database_status(
+            org_slug=sentry_api.ORG_SLUG,
+            project_id=org_data["backend_id"],
+            environment=org_data["backend_env"],
+            cursor=cursor,
+        )
+    except Exception as e:
+        sentry_api.capture_exception(e)
+        return _load_more_queries(org_data, cursor, shown, error=True)
+
+    if not data:
+        return ()
+
+    rows = data["rows"][: max(0, DATABASE_MAX_ROWS - shown)]
+    return (
+        *_database_rows(rows),
+        _load_more_queries(org_data, data["next_cursor"], shown + len(rows)),
+    )
+
+
+def breakdown_toggle(card, org_data):
+    """
+    Shows the transactions that spend the most time in caches or queues.
+
+    They are only loaded when the breakdown is opened for the first time.
+    """
+    params = urllib.parse.urlencode({"pair": org_data["pair"]})
+    return Details(
+        Summary("By transaction"),
         Div(
-            Div(
-                # Headline
-                Div("Query", cls="row-header"),
-                Div("Avg Duration", cls="row-header right"),
-                Div("Time Spent", cls="row-header right"),
-                # Queries
-                *output,
-                cls="grid-card-list",
-            ),
-            cls="body",
+            "One moment please, loading data...",
+            hx_get=f"/status/{card}/breakdown?{params}",
+            hx_trigger="toggle once from:closest details",
+            hx_swap="outerHTML",
+            cls="breakdown-list",
         ),
-        id="database",
-        cls="card",
-        style="min-height: 400px; height: unset;",
+        cls="breakdown",
+    )
+
+
+def _cache_hit_rate(row):
+    # Like on the card, the hit rate is shown
+    return fmt_percentage(1 - row["miss_rate"])
+
+
+def _processing_time(row):
+    return fmt_duration(row["processing_time_avg"])
+
+
+async def breakdown(card, org_data):
+    """
+    The list of the transactions that spend the most time in caches or queues.
+    """
+    if card == "caches":
+        get_status = sentry_api.get_caches_breakdown_status
+        value = _cache_hit_rate
+    else:
+        get_status = sentry_api.get_queues_breakdown_status
+        value = _processing_time
+
+    try:
+        rows = await get_status(
+            org_slug=sentry_api.ORG_SLUG,
+            project_id=org_data["backend_id"],
+            environment=org_data["backend_env"],
+        )
+    except Exception as e:
+        sentry_api.capture_exception(e)
+        return Div("Could not load the transactions.", cls="breakdown-list")
+
+    if not rows:
+        return Div("No data available.", cls="breakdown-list")
+
+    return Div(
+        *[
+            Div(
+                Span(row["transaction"], title=row["transaction"], cls="transaction"),
+                Span(value(row), cls="value"),
+                cls="breakdown-row",
+            )
+            for row in rows
+        ],
+        cls="breakdown-list",
     )
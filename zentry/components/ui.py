@@ -1,4 +1,10 @@
+import functools
+import html
+import re
+import urllib.parse
+
 from fasthtml.common import *
+from fasthtml.svg import Polyline, Svg
 from utils import fmt_percentage_signed
 
 
@@ -15,6 +21,17 @@ SQL_KEYWORDS = [
     "WHERE",
 ]
 
+# Matches all keywords in one pass. Longer keywords first, so "ORDER BY" wins over "OR".
+# Keywords inside identifiers (like "ORDERS") are not matched.
+SQL_KEYWORDS_PATTERN = re.compile(
+    r"\b(?:"
+    + "|".join(
+        r"\s+".join(re.escape(word) for word in keyword.split())
+        for keyword in sorted(SQL_KEYWORDS, key=len, reverse=True)
+    )
+    + r")\b"
+)
+
 
 def no_data(header):
     return Div(
@@ -27,40 +44,158 @@ def no_data(header):
     )
 
 
-def loading_placeholder(header, route):
+def card_event(pair, card):
+    """
+    Name of the event the /status/stream endpoint sends a card of a project pair with.
+    """
+    # Quoted, htmx reads a comma as the separator of several event names
+    return f"{urllib.parse.quote(pair, safe='')}-{card}"
+
+
+def loading_placeholder(header, pair, card):
+    """
+    Replaced by the card as soon as it is sent by the /status/stream endpoint.
+    """
     return Div(
         header,
         Div(
             Div("One moment please, loading data...", cls="loading-msg"),
             cls="body",
         ),
-        hx_get=route,
-        hx_trigger="load",
+        sse_swap=card_event(pair, card),
         hx_swap="outerHTML",
         cls="card",
     )
 
 
-def metric(title, id, value, value_prev, score, formatter=lambda x: x):
+def data_delayed(placeholder, pair, card, retry_in):
     """
-    The card representing one metric.
+    A card whose data takes too long to load. It loads itself again after `retry_in` seconds.
+
+    Made from the loading placeholder of the card, to keep its header.
     """
-    change = (value_prev - value) / value_prev
+    return _retrying_card(
+        placeholder,
+        pair,
+        card,
+        retry_in,
+        Div("The data is delayed, trying again...", cls="loading-msg"),
+    )
+
 
+def data_failed(placeholder, pair, card, retry_in):
+    """
+    A card whose data could not be loaded from Sentry. It loads itself again after `retry_in` seconds.
+
+    Made from the loading placeholder of the card, to keep its header.
+    """
+    return _retrying_card(
+        placeholder,
+        pair,
+        card,
+        retry_in,
+        Div("The data could not be loaded, trying again...", cls="error-msg"),
+    )
+
+
+def _retrying_card(placeholder, pair, card, retry_in, message):
+    header = placeholder.children[0]
     return Div(
-        Div(title, cls="header"),
-        Div(formatter(value), cls="value"),
+        header,
         Div(
+            message,
+            cls="body",
+        ),
+        hx_get=f"/status/{card}?{urllib.parse.urlencode({'pair': pair})}",
+        hx_trigger=f"load delay:{retry_in}s",
+        hx_swap="outerHTML",
+        cls="card",
+    )
+
+
+def sparkline(values, width=80, height=16):
+    """
+    A small line chart of the values of every day.
+    """
+    # Days without data are left out
+    points = [(index, value) for index, value in enumerate(values) if value is not None]
+    if len(points) < 2:
+        return None
+
+    low = min(value for _, value in points)
+    high = max(value for _, value in points)
+    step = width / (len(values) - 1)
+    scale = (height - 2) / (high - low) if high > low else 0
+
+    return Svg(
+        Polyline(
+            points=" ".join(
+                f"{index * step:.1f},{height - 1 - (value - low) * scale:.1f}"
+                for index, value in points
+            ),
+            fill="none",
+            stroke="currentColor",
+            stroke_width=1.5,
+        ),
+        viewBox=f"0 0 {width} {height}",
+        width=width,
+        height=height,
+        cls="trend",
+    )
+
+
+def metric(title, id, value, value_prev, score, formatter=lambda x: x, trend=None):
+    """
+    The card representing one metric, with the trend of the value over the days (if given).
+    """
+    if value_prev is None:
+        change_div = Div(
+            "–",
+            title="No data for the last time period",
+            cls="change",
+        )
+    elif value_prev == 0 and value != 0:
+        # A change from 0 can not be given in percent
+        change_div = Div(
+            "–",
+            title="The value was 0 in the last time period",
+            cls="change",
+        )
+    else:
+        change = (value_prev - value) / value_prev if value_prev else 0
+        change_div = Div(
             fmt_percentage_signed(change),
             title="Change compared to the last time period",
             cls=f'change {"up" if change >=0 else "down"}',
-        ),
+        )
+
+    return Div(
+        Div(title, cls="header"),
+        Div(formatter(value), cls="value"),
+        change_div,
+        sparkline(trend) if trend else None,
         Div(score, cls=f"score {score.lower()}"),
         id=id,
         cls="metric",
     )
 
 
+def data_age(fetched_at, stale=False):
+    """
+    When the data shown in a card was fetched from Sentry.
+    """
+    if stale:
+        text = f"Outdated data from {fetched_at:%b %d, %H:%M} UTC"
+    else:
+        text = f"Updated {fetched_at:%H:%M} UTC"
+
+    return Div(
+        text,
+        title=f"Data fetched from Sentry at {fetched_at.isoformat()}",
+        cls="data-age stale" if stale else "data-age",
+    )
+
+
 def metric_simple(id, value, formatter=lambda x: x, cls="row"):
     """
     The card representing one metric in the databases list.
@@ -72,16 +207,31 @@ def metric_simple(id, value, formatter=lambda x: x, cls="row"):
     )
 
 
-def query(query, id, cls="row query"):
+@functools.lru_cache(maxsize=1024)
+def highlight_sql(query):
     """
-    Format the query in Markdown and then render the markdown.
-    This is why we need MarkdownJS in fast_app()
+    The query as HTML, with the SQL keywords in bold.
+
+    The same queries are shown over and over, so the HTML is cached.
     """
-    for keyword in SQL_KEYWORDS:
-        query = query.replace(keyword, f"**{keyword}**")
+    parts = []
+    position = 0
+    for match in SQL_KEYWORDS_PATTERN.finditer(query):
+        parts.append(html.escape(query[position : match.start()]))
+        parts.append(f"<strong>{html.escape(match.group())}</strong>")
+        position = match.end()
+
+    parts.append(html.escape(query[position:]))
+    return "".join(parts)
+
 
+def query(query, id, cls="row query"):
+    """
+    The query with its SQL keywords highlighted.
+    """
+    # Queries differing only in whitespace are cached once
     return Div(
-        Div(query, cls="marked"),
+        NotStr(highlight_sql(" ".join(query.split()))),
         id=id,
         cls=cls,
     )
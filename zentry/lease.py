@@ -0,0 +1,55 @@
+import asyncio
+import secrets
+import time
+
+# Only delete the lease if it is still ours, it may have expired and been taken by someone else
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class Lease:
+    """
+    A lock in Redis, shared by all Zentry processes, that expires after `ttl` seconds.
+
+    The lease makes sure only one process does some work at a time (like fetching
+    a result from the Sentry API). The others wait until the lease is released and
+    use the result of that work. If the holder dies, the lease expires on its own.
+    """
+
+    def __init__(self, redis, name, ttl):
+        self.redis = redis
+        self.name = name
+        self.ttl = ttl
+        self.token = secrets.token_hex(8)
+        self.acquired = False
+
+    async def acquire(self):
+        """
+        Take the lease, if nobody else has it. Returns `True` if we got it.
+        """
+        self.acquired = bool(
+            await self.redis.set(self.name, self.token, nx=True, px=int(self.ttl * 1000))
+        )
+        return self.acquired
+
+    async def release(self):
+        if self.acquired:
+            self.acquired = False
+            await self.redis.eval(RELEASE_SCRIPT, 1, self.name, self.token)
+
+    async def wait(self, timeout, interval=0.1):
+        """
+        Wait until nobody has the lease anymore. Returns `False` if it is still taken after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while await self.redis.exists(self.name):
+            if time.monotonic() >= deadline:
+                return False
+
+            await asyncio.sleep(interval)
+
+        return True
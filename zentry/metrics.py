@@ -0,0 +1,262 @@
+import atexit
+import collections
+import glob
+import os
+import shutil
+import tempfile
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+
+# With several workers, every worker writes its metrics to files in this directory, see `prepare_multiprocess()`
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Duration of calls to the Sentry API (answered by Sentry itself or the Redis cache)
+sentry_api_duration = Histogram(
+    "zentry_sentry_api_request_duration_seconds",
+    "Duration of requests to the Sentry API, including requests answered by the Redis cache.",
+    ["query", "source"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+sentry_api_inflight = Gauge(
+    "zentry_sentry_api_inflight_requests",
+    "Requests to the Sentry API currently in flight.",
+    multiprocess_mode="livesum",
+)
+
+card_render_duration = Histogram(
+    "zentry_card_render_duration_seconds",
+    "Time to render a card that was not in the rendered card cache.",
+    ["card"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+upstream_calls_per_page_view = Histogram(
+    "zentry_upstream_calls_per_page_view",
+    "Calls to the Sentry API needed to render all cards of one page view.",
+    buckets=(0, 1, 2, 4, 7, 10, 13, 20, 30, 50),
+)
+
+inflight_requests = Gauge(
+    "zentry_inflight_requests",
+    "Requests to Zentry currently being handled.",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+
+sentry_api_retries = Counter(
+    "zentry_sentry_api_retries",
+    "Retried requests to the Sentry API, by reason (status code or \"connection\").",
+    ["reason"],
+)
+
+sentry_api_hedged_requests = Counter(
+    "zentry_sentry_api_hedged_requests",
+    "Slow requests to the Sentry API that were sent a second time, by the request that answered first (\"original\" or \"hedge\").",
+    ["winner"],
+)
+
+deadline_exceeded = Counter(
+    "zentry_deadline_exceeded",
+    "Results that were not fetched from the Sentry API before the deadline of their card, by query.",
+    ["query"],
+)
+
+circuit_breaker_rejections = Counter(
+    "zentry_circuit_breaker_rejections",
+    "Requests to the Sentry API that were not made because the circuit breaker of the endpoint was open.",
+    ["breaker"],
+)
+
+lease_waits = Counter(
+    "zentry_lease_waits",
+    "Results another worker was already fetching, by outcome (\"shared\" or \"timeout\").",
+    ["outcome"],
+)
+
+errors = Counter(
+    "zentry_errors",
+    "Errors while fetching data or rendering cards.",
+    ["where"],
+)
+
+# Results of lookups in the Redis cache of query results: "hit", "stale" or "miss"
+redis_cache_results = collections.Counter()
+
+# The in-memory caches, by name
+caches = {}
+
+# The rate limiters of the Sentry API, by organization slug
+rate_limiters = {}
+
+# The circuit breakers of the Sentry API (by endpoint and dataset) and of Redis
+circuit_breakers = {}
+
+# The values of the states of the circuit breakers in the metrics
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def prepare_multiprocess():
+    """
+    Let several worker processes share their metrics. Call it before starting the workers.
+
+    The workers write their counters, histograms and gauges to files in `PROMETHEUS_MULTIPROC_DIR`
+    (a new temporary directory, if it is not set), and `generate()` adds up the values of all workers.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path is None:
+        path = tempfile.mkdtemp(prefix="zentry-metrics-")
+        atexit.register(shutil.rmtree, path, ignore_errors=True)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+    # The metrics of an earlier run do not count
+    for name in glob.glob(os.path.join(path, "*.db")):
+        os.remove(name)
+
+
+def generate():
+    """
+    Returns all metrics in the Prometheus text format.
+
+    With several workers only the metrics shared through files are returned (see `prepare_multiprocess()`),
+    not those of the collectors below. They read the state of the worker answering the request.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+
+    return generate_latest()
+
+
+def register_cache(name, cache):
+    caches[name] = cache
+
+
+def register_rate_limiter(org_slug, limiter):
+    rate_limiters[org_slug] = limiter
+
+
+def register_circuit_breaker(name, breaker):
+    circuit_breakers[name] = breaker
+
+
+class CacheCollector:
+    """
+    Exposes the counters of the Redis cache and of all registered in-memory caches.
+    """
+
+    def collect(self):
+        requests = CounterMetricFamily(
+            "zentry_cache_requests",
+            "Lookups in the caches of Zentry, by result.",
+            labels=["cache", "result"],
+        )
+        evictions = CounterMetricFamily(
+            "zentry_cache_evictions",
+            "Entries evicted from the in-memory caches because they were full.",
+            labels=["cache"],
+        )
+        entries = GaugeMetricFamily(
+            "zentry_cache_entries",
+            "Entries in the in-memory caches.",
+            labels=["cache"],
+        )
+
+        for result, count in redis_cache_results.items():
+            requests.add_metric(["redis", result], count)
+
+        for name, cache in caches.items():
+            requests.add_metric([name, "hit"], cache.hits)
+            requests.add_metric([name, "miss"], cache.misses)
+            evictions.add_metric([name], cache.evictions)
+            entries.add_metric([name], len(cache))
+
+        yield requests
+        yield evictions
+        yield entries
+
+
+class RateLimitCollector:
+    """
+    Exposes the state of the rate limiters of the Sentry API.
+    """
+
+    def collect(self):
+        tokens = GaugeMetricFamily(
+            "zentry_rate_limit_tokens",
+            "Requests that can be made to the Sentry API right now without waiting.",
+            labels=["org"],
+        )
+        remaining = GaugeMetricFamily(
+            "zentry_rate_limit_remaining",
+            "Requests left in the current rate limit window, as last reported by Sentry.",
+            labels=["org"],
+        )
+        throttled = GaugeMetricFamily(
+            "zentry_rate_limit_throttled",
+            "1 if Sentry told us to stop making requests for now, else 0.",
+            labels=["org"],
+        )
+        waits = CounterMetricFamily(
+            "zentry_rate_limit_waits",
+            "Requests to the Sentry API that had to wait for the rate limit.",
+            labels=["org"],
+        )
+        wait_seconds = CounterMetricFamily(
+            "zentry_rate_limit_wait_seconds",
+            "Time spent waiting for the rate limit of the Sentry API.",
+            labels=["org"],
+        )
+
+        for org, limiter in rate_limiters.items():
+            tokens.add_metric([org], limiter.tokens)
+            if limiter.remaining is not None:
+                remaining.add_metric([org], limiter.remaining)
+            throttled.add_metric([org], 1 if limiter.throttled else 0)
+            waits.add_metric([org], limiter.waits)
+            wait_seconds.add_metric([org], limiter.wait_seconds)
+
+        yield tokens
+        yield remaining
+        yield throttled
+        yield waits
+        yield wait_seconds
+
+
+class CircuitBreakerCollector:
+    """
+    Exposes the state of the circuit breakers of the Sentry API.
+    """
+
+    def collect(self):
+        state = GaugeMetricFamily(
+            "zentry_circuit_breaker_state",
+            "State of the circuit breaker of an endpoint of the Sentry API (or of Redis): 0 closed, 1 half open, 2 open.",
+            labels=["breaker"],
+        )
+        opens = CounterMetricFamily(
+            "zentry_circuit_breaker_opens",
+            "How often the circuit breaker opened because of failed requests.",
+            labels=["breaker"],
+        )
+
+        for name, breaker in circuit_breakers.items():
+            state.add_metric([name], BREAKER_STATES[breaker.state])
+            opens.add_metric([name], breaker.opens)
+
+        yield state
+        yield opens
+
+
+REGISTRY.register(CacheCollector())
+REGISTRY.register(RateLimitCollector())
+REGISTRY.register(CircuitBreakerCollector())
@@ -0,0 +1,208 @@
+import asyncio
+import cProfile
+import collections
+import datetime
+import hmac
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+# Secret needed for all profiling features. Without it profiling is disabled.
+PROFILING_TOKEN = os.environ.get("ZENTRY_PROFILING_TOKEN")
+
+# Directory where profiles and memory snapshots are saved (optional)
+PROFILE_DIR = os.environ.get("ZENTRY_PROFILE_DIR")
+
+# Set to "1" to trace memory allocations from startup on (slows Zentry down)
+TRACEMALLOC_ENABLED = os.environ.get("ZENTRY_TRACEMALLOC", "0") == "1"
+
+# How many frames of the call stack are stored per memory allocation
+TRACEMALLOC_FRAMES = 10
+
+# The header a request has to send (with the token) to be profiled
+PROFILE_HEADER = b"x-zentry-profile"
+
+# Only one profile can be recorded at a time
+profile_lock = asyncio.Lock()
+
+# The reports of the last profiled requests
+request_reports = collections.deque(maxlen=20)
+
+# Memory snapshot of the last call to `memory_report()`, to show what changed since then
+last_memory_snapshot = None
+
+# Only one memory report is made at a time
+memory_lock = asyncio.Lock()
+
+if TRACEMALLOC_ENABLED:
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+
+
+def is_authorized(token):
+    if not PROFILING_TOKEN or not token:
+        return False
+
+    # Compared as bytes, `compare_digest()` refuses strings with non-ASCII characters
+    return hmac.compare_digest(token.encode(), PROFILING_TOKEN.encode())
+
+
+def _save_path(name, extension):
+    if not PROFILE_DIR:
+        return None
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return os.path.join(PROFILE_DIR, f"{name}-{now:%Y%m%dT%H%M%S%f}.{extension}")
+
+
+def profile_report(profiler, sort="cumulative", limit=40):
+    """
+    The functions that took the most time, as text.
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+def _save_profile(profiler, name):
+    # Can be opened with `python -m pstats` or tools like snakeviz
+    path = _save_path(name, "prof")
+    if path is not None:
+        profiler.dump_stats(path)
+
+    return path
+
+
+async def profile_for(seconds, sort="cumulative", limit=40):
+    """
+    Profile everything Zentry does for the given number of seconds.
+
+    Returns a tuple `(report, path)` with the path of the saved profile, if any.
+    Returns `None` if another profile is being recorded.
+    """
+    if profile_lock.locked():
+        return None
+
+    async with profile_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+    path = _save_profile(profiler, "window")
+    return profile_report(profiler, sort, limit), path
+
+
+async def memory_report(limit=30):
+    """
+    The lines of code that allocated the most memory still in use, and the
+    biggest changes since the last report, as text.
+
+    Taking a snapshot of a large heap takes a while, so it is done in a thread.
+    """
+    async with memory_lock:
+        return await asyncio.to_thread(_memory_report, limit)
+
+
+def _memory_report(limit):
+    global last_memory_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        return "Started tracing memory allocations. Ask again later to see them.\n"
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [
+        f"Traced memory: {current / 1024 / 1024:.1f} MiB (peak: {peak / 1024 / 1024:.1f} MiB)",
+        "",
+        f"Top {limit} lines by memory in use:",
+    ]
+    lines += [str(stat) for stat in snapshot.statistics("lineno")[:limit]]
+
+    if last_memory_snapshot is not None:
+        lines += ["", f"Top {limit} changes since the last report:"]
+        lines += [
+            str(stat)
+            for stat in snapshot.compare_to(last_memory_snapshot, "lineno")[:limit]
+        ]
+
+    path = _save_path("memory", "snapshot")
+    if path is not None:
+        # Can be loaded with `tracemalloc.Snapshot.load()`
+        snapshot.dump(path)
+        lines += ["", f"Saved to {path}"]
+
+    last_memory_snapshot = snapshot
+    return "\n".join(lines) + "\n"
+
+
+async def stop_memory_tracing():
+    """
+    Stop tracing memory allocations, it slows Zentry down.
+    """
+    global last_memory_snapshot
+    async with memory_lock:
+        last_memory_snapshot = None
+        if not tracemalloc.is_tracing():
+            return "Memory allocations are not being traced.\n"
+
+        tracemalloc.stop()
+        return "Stopped tracing memory allocations.\n"
+
+
+class ProfileRequestMiddleware:
+    """
+    Profiles requests sending the `X-Zentry-Profile` header with the profiling token.
+
+    The reports of the last profiled requests are available at /debug/requests,
+    the profiles are also saved to `PROFILE_DIR` (if set).
+    Requests are not profiled while another profile is being recorded.
+
+    The profiler records the whole event loop while the request is handled,
+    so the profile also contains the other requests and background refreshes of that time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_TOKEN:
+            return await self.app(scope, receive, send)
+
+        # Headers are latin-1, like Starlette decodes them
+        token = dict(scope["headers"]).get(PROFILE_HEADER, b"").decode("latin-1")
+        if not is_authorized(token) or profile_lock.locked():
+            return await self.app(scope, receive, send)
+
+        async with profile_lock:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.disable()
+                duration = time.perf_counter() - start
+
+        path = _save_profile(profiler, "request")
+        request_reports.append(
+            {
+                "path": scope["path"],
+                "query_string": scope["query_string"].decode(),
+                "duration": duration,
+                "file": path,
+                "report": profile_report(profiler),
+            }
+        )
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Limits how many requests are made per second, allowing short bursts of up to `capacity` requests.
+
+    The bucket also follows the rate limit reported by the server: when no requests
+    are left in the current window, or the server asks us to back off, all requests
+    wait until the given time. The number of waits and the time spent waiting is counted.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # Set when the server told us to stop making requests until this time (monotonic)
+        self.paused_until = 0
+        # The last rate limit reported by the server, `None` if unknown
+        self.remaining = None
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    @property
+    def throttled(self):
+        return self.paused_until > time.monotonic()
+
+    async def acquire(self):
+        """
+        Wait until a request may be made.
+        """
+        # The lock makes waiting requests go one after the other, in order
+        async with self._lock:
+            start = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if self.paused_until > now:
+                    delay = self.paused_until - now
+                else:
+                    self._refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+
+                    delay = (1 - self.tokens) / self.rate
+
+                await asyncio.sleep(delay)
+
+            waited = time.monotonic() - start
+            if waited > 0.001:
+                self.waits += 1
+                self.wait_seconds += waited
+
+    def pause(self, seconds):
+        """
+        Make no requests for the next `seconds` seconds.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update(self, remaining, reset_in):
+        """
+        Follow the rate limit reported by the server: `remaining` requests in the
+        current window, which ends in `reset_in` seconds.
+        """
+        self.remaining = remaining
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+        if remaining <= 0 and reset_in > 0:
+            self.pause(reset_in)
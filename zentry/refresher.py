@@ -0,0 +1,183 @@
+import asyncio
+import datetime
+import os
+import random
+
+import sentry_api
+from lease import Lease
+
+# Set to "0" to disable refreshing the cache in the background
+REFRESH_ENABLED = os.environ.get("ZENTRY_REFRESH_ENABLED", "1") == "1"
+
+# How often (in seconds) all queries of the dashboard are refreshed.
+# Must be shorter than the time results are cached, so viewers never hit an expired cache.
+REFRESH_INTERVAL = int(
+    os.environ.get("ZENTRY_REFRESH_INTERVAL", sentry_api.CACHE_EXPIRE_AFTER * 3 // 4)
+)
+
+# Max random delay (in seconds) before each refresh, so several Zentry instances do not refresh in lockstep
+REFRESH_JITTER = int(
+    os.environ.get("ZENTRY_REFRESH_JITTER", min(60, REFRESH_INTERVAL // 10))
+)
+
+# How many queries are refreshed at the same time (over all project pairs)
+REFRESH_CONCURRENCY = int(os.environ.get("ZENTRY_REFRESH_CONCURRENCY", 4))
+
+refresher_task = None
+
+
+def get_dashboard_queries(pair):
+    """
+    All the queries needed to render the dashboard of a project pair.
+
+    Returns a list of `(get_status, kwargs)` tuples, the most important ones first.
+    """
+    frontend = {
+        "org_slug": sentry_api.ORG_SLUG,
+        "project_id": pair["frontend_id"],
+        "environment": pair["frontend_env"],
+    }
+    backend = {
+        "org_slug": sentry_api.ORG_SLUG,
+        "project_id": pair["backend_id"],
+        "environment": pair["backend_env"],
+    }
+
+    queries = []
+    for preview_time_period in (False, True):
+        queries += [
+            (
+                sentry_api.get_frontend_status,
+                {**frontend, "preview_time_period": preview_time_period},
+            ),
+            (
+                sentry_api.get_backend_status,
+                {**frontend, "preview_time_period": preview_time_period},
+            ),
+            (
+                sentry_api.get_requests_status,
+                {**frontend, "preview_time_period": preview_time_period},
+            ),
+            (
+                sentry_api.get_requests_status,
+                {**backend, "preview_time_period": preview_time_period},
+            ),
+            (
+                sentry_api.get_caches_status,
+                {**backend, "preview_time_period": preview_time_period},
+            ),
+            (
+                sentry_api.get_queues_status,
+                {**backend, "preview_time_period": preview_time_period},
+            ),
+        ]
+
+    # The database card only shows the current time period
+    queries.append((sentry_api.get_database_status, backend))
+
+    return queries
+
+
+def plan_refresh(days):
+    """
+    All queries of all project pairs for the given days, in the order they should be refreshed.
+
+    Returns a list of `(priority, get_status, kwargs, day)` tuples, sorted by priority.
+    Queries needed by more than one pair are only refreshed once, with the highest priority.
+    Queries fetched with the same request (see `sentry_api.plan_queries()`) are refreshed together.
+    """
+    jobs = {}
+    pairs = sorted(sentry_api.PROJECT_PAIRS.values(), key=lambda pair: pair["priority"])
+    for day_index, day in enumerate(days):
+        for pair in pairs:
+            for query_index, (get_status, kwargs) in enumerate(
+                get_dashboard_queries(pair)
+            ):
+                key = (get_status.query_group, tuple(sorted(kwargs.items())), day)
+                if key not in jobs:
+                    # Today before tomorrow, then by pair, then by importance of the query
+                    priority = (day_index, pair["priority"], query_index)
+                    jobs[key] = (priority, get_status, kwargs, day)
+
+    return sorted(jobs.values(), key=lambda job: job[0])
+
+
+async def _refresh_worker(queue):
+    while True:
+        priority, get_status, kwargs, day = await queue.get()
+        try:
+            with sentry_api.refreshing(day=day):
+                await get_status(**kwargs)
+        except Exception as e:
+            sentry_api.capture_exception(e)
+        finally:
+            queue.task_done()
+
+
+async def refresh_all():
+    """
+    Fetch all queries of all dashboards from the Sentry API and store them in the cache.
+
+    The queries are processed in order of priority by a fixed number of workers.
+    If the next refresh would happen after midnight (UTC), the queries for
+    tomorrow are fetched as well, so the cache is already warm when the time periods change.
+    """
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    days = [today]
+
+    next_refresh = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        seconds=REFRESH_INTERVAL
+    )
+    if next_refresh.date() != today:
+        days.append(today + datetime.timedelta(days=1))
+
+    queue = asyncio.Queue()
+    for job in plan_refresh(days):
+        queue.put_nowait(job)
+
+    workers = [
+        asyncio.create_task(_refresh_worker(queue)) for _ in range(REFRESH_CONCURRENCY)
+    ]
+    try:
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+
+async def _take_refresh_turn():
+    """
+    Returns `True` if this worker should refresh the dashboard now.
+
+    Only one worker refreshes per interval, the others use the results it stores in Redis.
+    The turn is not released, it expires after the interval.
+    """
+    key = f"zentry:v{sentry_api.CACHE_FORMAT_VERSION}:{sentry_api.REFERRER}:refresh"
+    lease = Lease(sentry_api.get_redis(), key, REFRESH_INTERVAL)
+    try:
+        return await sentry_api.call_redis(lease.acquire)
+    except Exception as e:
+        # Without Redis every worker refreshes its own results
+        sentry_api.report_redis_error(e)
+        return True
+
+
+async def _run():
+    while True:
+        await asyncio.sleep(random.uniform(0, REFRESH_JITTER))
+        if await _take_refresh_turn():
+            await refresh_all()
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+def start():
+    global refresher_task
+    if REFRESH_ENABLED and refresher_task is None:
+        refresher_task = asyncio.create_task(_run())
+
+
+async def stop():
+    global refresher_task
+    if refresher_task is not None:
+        refresher_task.cancel()
+        refresher_task = None
@@ -0,0 +1,73 @@
+from fasthtml.common import *
+from starlette.responses import PlainTextResponse
+import profiling
+
+debug_app, rt = fast_app()
+
+
+def _authorized(request):
+    # The token is sent as "Authorization: Bearer <token>"
+    authorization = request.headers.get("authorization", "")
+    return profiling.is_authorized(authorization.removeprefix("Bearer ").strip())
+
+
+def _not_found():
+    # Do not reveal that the profiling endpoints exist
+    return Response("Not Found", status_code=404)
+
+
+@debug_app.get("/profile")
+async def get_profile(
+    request, seconds: float = 10, sort: str = "cumulative", limit: int = 40
+):
+    """
+    Profile everything Zentry does for some seconds, while it handles real traffic.
+    """
+    if not _authorized(request):
+        return _not_found()
+
+    result = await profiling.profile_for(min(seconds, 300), sort, limit)
+    if result is None:
+        return Response("Another profile is being recorded", status_code=409)
+
+    report, path = result
+    if path is not None:
+        report += f"\nSaved to {path}\n"
+
+    return PlainTextResponse(report)
+
+
+@debug_app.get("/requests")
+async def get_request_profiles(request):
+    """
+    The profiles of the last requests sent with the `X-Zentry-Profile` header.
+    """
+    if not _authorized(request):
+        return _not_found()
+
+    reports = []
+    for item in reversed(profiling.request_reports):
+        url = item["path"] + ("?" + item["query_string"] if item["query_string"] else "")
+        title = f"{url} ({item['duration'] * 1000:.1f} ms)"
+        if item["file"] is not None:
+            title += f", saved to {item['file']}"
+
+        reports.append(f"{title}\n{'=' * len(title)}\n{item['report']}")
+
+    return PlainTextResponse("\n".join(reports) or "No profiled requests yet.\n")
+
+
+@debug_app.get("/memory")
+async def get_memory(request, limit: int = 30, stop: bool = False):
+    """
+    Where the memory in use was allocated, and what changed since the last call.
+
+    With `stop` set, tracing memory allocations is stopped instead.
+    """
+    if not _authorized(request):
+        return _not_found()
+
+    if stop:
+        return PlainTextResponse(await profiling.stop_memory_tracing())
+
+    return PlainTextResponse(await profiling.memory_report(limit))
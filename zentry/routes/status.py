@@ -1,62 +1,380 @@
+import asyncio
+import datetime
+import hashlib
+import os
+import re
+import time
+import urllib.parse
+
 from fasthtml.common import *
+from cache import TTLCache
 from components import (
     backend_requests_status,
     backend_status,
+    breakdown,
     caches_status,
+    card_event,
+    data_age,
+    data_delayed,
+    data_failed,
+    database_page,
     database_status,
     frontend_requests_status,
     frontend_status,
     queues_status,
 )
+import metrics
 import sentry_api
 
+# How long (in seconds) the rendered HTML of a card is cached
+FRAGMENT_CACHE_EXPIRE_AFTER = int(
+    os.environ.get("ZENTRY_FRAGMENT_CACHE_EXPIRE_AFTER", sentry_api.CACHE_EXPIRE_AFTER)
+)
+
+# How many cards are rendered at the same time for all /status/stream requests together
+STREAM_CONCURRENCY = int(os.environ.get("ZENTRY_STREAM_CONCURRENCY", 8))
+
+# How often (in seconds) the browser checks for new data of a card, 0 disables polling
+POLL_INTERVAL = int(os.environ.get("ZENTRY_POLL_INTERVAL", 5 * 60))
+
+# How many seconds a card may wait for data from the Sentry API, before it is shown
+# with the last known data or as delayed
+CARD_DEADLINE = float(os.environ.get("ZENTRY_CARD_DEADLINE", 10))
+
+# After how many seconds a delayed card tries again
+DELAYED_RETRY_INTERVAL = 5
+
+# After how many seconds a card whose data could not be loaded tries again
+FAILED_RETRY_INTERVAL = 30
+
+# The cursors of the Sentry API look like "0:100:0", anything else is not passed on
+CURSOR_PATTERN = re.compile(r"\d+:\d+:[01]")
+
+# All cards of the dashboard, by name
+CARDS = {
+    "frontend_requests": frontend_requests_status,
+    "backend_requests": backend_requests_status,
+    "frontend": frontend_status,
+    "backend": backend_status,
+    "caches": caches_status,
+    "queues": queues_status,
+    "database": database_status,
+}
+
+# The cards shown for every project pair on the summary page
+SUMMARY_CARDS = ["frontend", "backend"]
+
+fragment_cache = TTLCache(ttl=FRAGMENT_CACHE_EXPIRE_AFTER)
+metrics.register_cache("fragment", fragment_cache)
+
+# Shared by all streams, so many viewers of the summary do not render many times more cards at once
+stream_semaphore = asyncio.Semaphore(STREAM_CONCURRENCY)
+
 status_app, rt = fast_app()
 
 
-@status_app.get("/frontend_requests")
-async def get_frontend_requests_status():
-    return await frontend_requests_status(
-        org_data=sentry_api.org_data,
+class CardDataError(Exception):
+    """
+    Raised when data of a card could not be loaded from the Sentry API, and there is no last known data.
+    """
+
+
+async def render_card(card, pair=None):
+    """
+    Render the HTML of a card of a project pair, using the cached HTML if possible.
+
+    Returns a tuple `(html, version)`, the version changes whenever the card changes.
+
+    The cache key contains the projects and the time period of the data, so a new day results in a new card.
+    A cached card expires when the data it shows is not fresh anymore. Cards rendered
+    from stale data are not cached. Data from the snapshot (because the Sentry API failed)
+    is always shown as outdated. If data could not be loaded at all, `CardDataError` is raised,
+    so the card does not look like there is no data (see `render_unavailable_card()`).
+    If enabled, the card checks for new data every `POLL_INTERVAL` seconds, sending its version
+    along. It is only replaced if it changed (see `_handle_card_request()`), so rows loaded with
+    "Load more" and open breakdowns stay as they are.
+
+    Data that takes longer than `CARD_DEADLINE` seconds is replaced by the last known
+    data (shown as outdated). Without it, `DeadlineExceededError` is raised.
+    """
+    component = CARDS[card]
+    org_data = await sentry_api.ensure_org_data(pair)
+
+    time_period = sentry_api._get_time_period(preview_time_period=False)
+    key = (
+        card,
+        org_data["frontend_id"],
+        org_data["frontend_env"],
+        org_data["backend_id"],
+        org_data["backend_env"],
+        time_period,
     )
 
+    item = fragment_cache.get(key)
+    if item is not None:
+        return item
 
-@status_app.get("/backend_requests")
-async def get_backend_requests_status():
-    return await backend_requests_status(
-        org_data=sentry_api.org_data,
+    start = time.perf_counter()
+    with (
+        sentry_api.track_failed_calls() as errors,
+        sentry_api.track_data_age() as timestamps,
+        sentry_api.track_fallbacks() as fallbacks,
+        sentry_api.deadline(CARD_DEADLINE),
+    ):
+        content = await component(org_data=org_data)
+
+    # Data without a last known value is still being fetched, the card shows "No data" otherwise
+    if any(isinstance(error, sentry_api.DeadlineExceededError) for error in errors):
+        raise sentry_api.DeadlineExceededError(card)
+
+    # Data that failed to load would be shown as "No data" or as no change
+    if errors:
+        raise CardDataError(card)
+
+    ttl = FRAGMENT_CACHE_EXPIRE_AFTER
+    stale = bool(fallbacks)
+    if timestamps:
+        fetched_at = min(timestamps)
+        stale = stale or sentry_api.is_stale(fetched_at)
+        content = content(data_age(fetched_at, stale))
+
+        age = datetime.datetime.now(datetime.timezone.utc) - fetched_at
+        ttl = min(ttl, sentry_api.CACHE_EXPIRE_AFTER - age.total_seconds())
+
+    html = to_xml(content)
+    version = _version(html)
+    if POLL_INTERVAL:
+        params = urllib.parse.urlencode({"pair": org_data["pair"], "version": version})
+        html = to_xml(
+            content(
+                hx_get=f"/status/{card}?{params}",
+                hx_trigger=f"every {POLL_INTERVAL}s",
+                hx_swap="outerHTML",
+            )
+        )
+
+    if not stale:
+        fragment_cache.set(key, (html, version), ttl=ttl)
+
+    metrics.card_render_duration.labels(card).observe(time.perf_counter() - start)
+
+    return html, version
+
+
+async def render_unavailable_card(card, pair, error):
+    """
+    The card shown while its data is still being fetched (`DeadlineExceededError`),
+    or after it could not be loaded (`CardDataError`). It tries again after a few seconds.
+    """
+    org_data = await sentry_api.ensure_org_data(pair)
+    placeholder = await CARDS[card](org_data=org_data, loading=True)
+    if isinstance(error, sentry_api.DeadlineExceededError):
+        return to_xml(
+            data_delayed(placeholder, org_data["pair"], card, DELAYED_RETRY_INTERVAL)
+        )
+
+    return to_xml(
+        data_failed(placeholder, org_data["pair"], card, FAILED_RETRY_INTERVAL)
     )
 
 
-@status_app.get("/frontend")
-async def get_frontend_status():
-    return await frontend_status(
-        org_data=sentry_api.org_data,
+def _sse_event(event, html):
+    # An event needs at least one data line, otherwise the browser ignores it
+    data = "".join(f"data: {line}\n" for line in html.splitlines() or [""])
+    return f"event: {event}\n{data}\n"
+
+
+async def _render_card_event(pair, card):
+    """
+    Returns a tuple `(event, upstream_calls)` with the number of calls made to the Sentry API.
+    """
+    upstream_calls = []
+    try:
+        async with stream_semaphore:
+            with sentry_api.track_upstream_calls() as upstream_calls:
+                html, _ = await render_card(card, pair)
+    except (sentry_api.DeadlineExceededError, CardDataError) as e:
+        html = await render_unavailable_card(card, pair, e)
+    except Exception as e:
+        sentry_api.capture_exception(e)
+        metrics.errors.labels("card").inc()
+        # Fall back to loading the card with its own request
+        html = to_xml(
+            Div(
+                hx_get=f"/status/{card}?{urllib.parse.urlencode({'pair': pair})}",
+                hx_trigger="load",
+                hx_swap="outerHTML",
+                cls="card",
+            )
+        )
+
+    return _sse_event(card_event(pair, card), html), len(upstream_calls)
+
+
+async def _card_events(pairs, cards):
+    # Start with the pairs with the highest priority (lowest value)
+    pairs = sorted(pairs, key=lambda pair: sentry_api.PROJECT_PAIRS[pair]["priority"])
+
+    tasks = [
+        asyncio.create_task(_render_card_event(pair, card))
+        for pair in pairs
+        for card in cards
+    ]
+    total_upstream_calls = 0
+    try:
+        with metrics.inflight_requests.labels("stream").track_inprogress():
+            # Send every card as soon as it is ready
+            for next_event in asyncio.as_completed(tasks):
+                event, upstream_calls = await next_event
+                total_upstream_calls += upstream_calls
+                yield event
+
+        metrics.upstream_calls_per_page_view.observe(total_upstream_calls)
+
+        # Tells the browser to close the connection (instead of reconnecting)
+        yield _sse_event("done", "")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _unknown_pair(pair):
+    return pair is not None and pair not in sentry_api.PROJECT_PAIRS
+
+
+def _version(html):
+    # The HTML of a card only changes when the data it shows changes
+    return hashlib.sha1(html.encode()).hexdigest()[:20]
+
+
+def _unchanged():
+    # htmx does not swap anything for "204 No Content"
+    return Response(status_code=204, headers={"Cache-Control": "no-store"})
+
+
+async def _handle_card_request(card, pair, request, version=None):
+    """
+    Respond with the HTML of a card, or with "304 Not Modified" if the browser already has it.
+
+    A polling card sends the `version` it shows, and gets "204 No Content" if it did not change,
+    so it is not replaced. (For a request made by htmx, the browser turns "304 Not Modified"
+    into the full cached response, which would replace the card.)
+    """
+    if _unknown_pair(pair):
+        return Response("Unknown project pair", status_code=404)
+
+    with metrics.inflight_requests.labels(card).track_inprogress():
+        try:
+            html, current_version = await render_card(card, pair)
+        except (sentry_api.DeadlineExceededError, CardDataError) as e:
+            if version is not None:
+                # A polling card keeps showing what it has, and tries again next time
+                return _unchanged()
+
+            # Not kept by the browser, so trying again never ends in "304 Not Modified"
+            return HTMLResponse(
+                await render_unavailable_card(card, pair, e),
+                headers={"Cache-Control": "no-store"},
+            )
+
+    if version == current_version:
+        return _unchanged()
+
+    etag = f'"{current_version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [value.strip() for value in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    return HTMLResponse(html, headers=headers)
+
+
+async def _handle_breakdown_request(card, pair):
+    """
+    Respond with the transactions that spend the most time in caches or queues.
+    """
+    if _unknown_pair(pair):
+        return Response("Unknown project pair", status_code=404)
+
+    org_data = await sentry_api.ensure_org_data(pair)
+    with metrics.inflight_requests.labels(f"{card}_breakdown").track_inprogress():
+        return await breakdown(card, org_data)
+
+
+@status_app.get("/stream")
+async def get_all_status(pair: str = None, summary: bool = False):
+    """
+    Streams all cards of a project pair or, for the summary, the summary cards of all pairs.
+    """
+    if _unknown_pair(pair):
+        return Response("Unknown project pair", status_code=404)
+
+    if summary:
+        return EventStream(_card_events(sentry_api.PROJECT_PAIRS, SUMMARY_CARDS))
+
+    return EventStream(
+        _card_events([pair or sentry_api.DEFAULT_PROJECT_PAIR], CARDS)
     )
 
 
+@status_app.get("/frontend_requests")
+async def get_frontend_requests_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("frontend_requests", pair, request, version)
+
+
+@status_app.get("/backend_requests")
+async def get_backend_requests_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("backend_requests", pair, request, version)
+
+
+@status_app.get("/frontend")
+async def get_frontend_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("frontend", pair, request, version)
+
+
 @status_app.get("/backend")
-async def get_backend_status():
-    return await backend_status(
-        org_data=sentry_api.org_data,
-    )
+async def get_backend_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("backend", pair, request, version)
 
 
 @status_app.get("/caches")
-async def get_caches_status():
-    return await caches_status(
-        org_data=sentry_api.org_data,
-    )
+async def get_caches_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("caches", pair, request, version)
 
 
 @status_app.get("/queues")
-async def get_queues_status():
-    return await queues_status(
-        org_data=sentry_api.org_data,
-    )
+async def get_queues_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("queues", pair, request, version)
+
+
+@status_app.get("/caches/breakdown")
+async def get_caches_breakdown(pair: str = None):
+    return await _handle_breakdown_request("caches", pair)
+
+
+@status_app.get("/queues/breakdown")
+async def get_queues_breakdown(pair: str = None):
+    return await _handle_breakdown_request("queues", pair)
 
 
 @status_app.get("/database")
-async def get_database_status():
-    return await database_status(
-        org_data=sentry_api.org_data,
-    )
+async def get_database_status(request, pair: str = None, version: str = None):
+    return await _handle_card_request("database", pair, request, version)
+
+
+@status_app.get("/database/page")
+async def get_database_page(cursor: str, pair: str = None, shown: int = 0):
+    """
+    The next page of queries of the database card, loaded with its "Load more" button.
+    """
+    if _unknown_pair(pair):
+        return Response("Unknown project pair", status_code=404)
+
+    # The cursor is part of the cache keys, so only valid cursors are accepted
+    if not CURSOR_PATTERN.fullmatch(cursor):
+        return Response("Invalid cursor", status_code=400)
+
+    org_data = await sentry_api.ensure_org_data(pair)
+    with metrics.inflight_requests.labels("database_page").track_inprogress():
+        return await database_page(org_data, cursor, shown)
@@ -1,73 +1,579 @@
+import asyncio
+import collections
+import contextlib
+import contextvars
 import datetime
+import functools
+import json
 import os
-from aiohttp_client_cache import CachedSession, RedisBackend
-
-
-TIME_PERIOD_IN_DAYS = 3
+import random
+import time
+import zlib
+
+import metrics
+import redis.asyncio
+import sentry_sdk
+from aiohttp import ClientConnectionError, ClientSession, ClientTimeout, TCPConnector
+from breaker import CLOSED, CircuitBreaker, CircuitOpenError
+from cache import TTLCache
+from lease import Lease
+from ratelimit import TokenBucket
+from snapshot import Snapshot
+
+
+# How many days are shown on the dashboard (and compared to the same number of days before)
+TIME_PERIOD_IN_DAYS = int(os.environ.get("ZENTRY_TIME_PERIOD_IN_DAYS", 3))
 REFERRER = os.environ.get("REFERRER", "zentry")
 API_BASE_URL = os.environ.get("SENTRY_API_BASE_URL", "https://sentry.io/api/0")
 REDIS_URL = os.environ.get("ZENTRY_REDIS_URL", "redis://localhost:6379")
 
-API_AUTH_TOKEN = os.environ.get("SENTRY_API_AUTH_TOKEN")
-if not API_AUTH_TOKEN:
-    raise ValueError(
-        "Please set the SENTRY_API_AUTH_TOKEN environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
-    )
+# How long (in seconds) to wait for Redis before doing without it
+REDIS_TIMEOUT = float(os.environ.get("ZENTRY_REDIS_TIMEOUT", 1))
 
-ORG_SLUG = os.environ.get("SENTRY_ORG_SLUG")
-if not ORG_SLUG:
-    raise ValueError(
-        "Please set the SENTRY_ORG_SLUG environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
-    )
+# How long (in seconds) Redis is not used after it failed to answer, see `call_redis()`
+REDIS_RETRY_INTERVAL = 5
 
-FRONTEND_ID = os.environ.get("SENTRY_FRONTEND_PROJECT_ID")
-if not FRONTEND_ID:
-    raise ValueError(
-        "Please set the SENTRY_FRONTEND_PROJECT_ID environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
-    )
+# Errors meaning that Redis is down or too slow (not that it answered with an error)
+REDIS_OUTAGE_ERRORS = (
+    redis.exceptions.ConnectionError,
+    redis.exceptions.TimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
 
-FRONTEND_ENV = os.environ.get("SENTRY_FRONTEND_ENVIRONMENT")
-if not FRONTEND_ENV:
-    raise ValueError(
-        "Please set the SENTRY_FRONTEND_ENVIRONMENT environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
-    )
+# Local file with the last known good result of every query (empty to keep them only in memory)
+SNAPSHOT_PATH = os.environ.get("ZENTRY_SNAPSHOT_PATH", "zentry-snapshot.sqlite3")
 
-BACKEND_ID = os.environ.get("SENTRY_BACKEND_PROJECT_ID")
-if not BACKEND_ID:
-    raise ValueError(
-        "Please set the SENTRY_BACKEND_PROJECT_ID environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
-    )
+# How often (in seconds) new results are saved to the snapshot file
+SNAPSHOT_SAVE_INTERVAL = 60
 
-BACKEND_ENV = os.environ.get("SENTRY_BACKEND_ENVIRONMENT")
-if not BACKEND_ENV:
-    raise ValueError(
-        "Please set the SENTRY_BACKEND_ENVIRONMENT environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
-    )
+# How long (in seconds) results of queries to the Sentry API are cached
+CACHE_EXPIRE_AFTER = int(os.environ.get("ZENTRY_CACHE_EXPIRE_AFTER", 60 * 60))
+
+# How many results of the `get_*_status` functions are kept in memory
+RESULT_CACHE_MAX_SIZE = int(os.environ.get("ZENTRY_RESULT_CACHE_MAX_SIZE", 1024))
+
+# How long (in seconds) expired results may still be served while they are refreshed in the background
+CACHE_STALE_GRACE = int(os.environ.get("ZENTRY_CACHE_STALE_GRACE", 24 * 60 * 60))
+
+# Set to "none" to store results in Redis without compressing them
+CACHE_COMPRESSION = os.environ.get("ZENTRY_CACHE_COMPRESSION", "zlib")
+
+# Results smaller than this (in bytes) are not worth compressing
+CACHE_COMPRESS_MIN_SIZE = 256
+
+# Change this when the format of the cached results changes, so old entries are ignored
+CACHE_FORMAT_VERSION = 3
+
+# How long (in seconds) after the end of a day its data is complete (events arrive with a delay)
+DAY_SETTLE_DELAY = 60 * 60
+
+# Connection pool of the HTTP client talking to the Sentry API
+HTTP_POOL_LIMIT = int(os.environ.get("ZENTRY_HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("ZENTRY_HTTP_POOL_LIMIT_PER_HOST", 20))
+HTTP_KEEPALIVE_TIMEOUT = int(os.environ.get("ZENTRY_HTTP_KEEPALIVE_TIMEOUT", 60))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("ZENTRY_HTTP_DNS_CACHE_TTL", 5 * 60))
+
+# How often (in seconds) the organization data is refreshed in the background
+ORG_DATA_REFRESH_INTERVAL = int(
+    os.environ.get("ZENTRY_ORG_DATA_REFRESH_INTERVAL", 60 * 60)
+)
+
+# How many requests per second are made to the Sentry API (per organization), and the largest burst allowed
+RATE_LIMIT_PER_SECOND = float(os.environ.get("ZENTRY_RATE_LIMIT_PER_SECOND", 5))
+RATE_LIMIT_BURST = int(os.environ.get("ZENTRY_RATE_LIMIT_BURST", 10))
+
+# How often failed requests to the Sentry API are retried, and the base delay (in seconds) between retries
+HTTP_RETRIES = int(os.environ.get("ZENTRY_HTTP_RETRIES", 3))
+HTTP_RETRY_BACKOFF = float(os.environ.get("ZENTRY_HTTP_RETRY_BACKOFF", 0.5))
+
+# Responses of the Sentry API that are worth retrying
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Max seconds to connect to the Sentry API, and to wait for data of a response.
+# Every retry has its own timeout, waiting for the rate limit does not count.
+HTTP_TIMEOUT = float(os.environ.get("ZENTRY_HTTP_TIMEOUT", 30))
+
+# A request to the Sentry API is sent a second time when it takes longer than this percentile
+# of the recent requests of the same query (see `_hedged_fetch_json()`). 0 disables hedging.
+HEDGE_PERCENTILE = float(os.environ.get("ZENTRY_HEDGE_PERCENTILE", 95))
+
+# How many durations of recent requests are kept per query, and how many are needed before hedging
+HEDGE_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+
+# After how many failed requests in a row no more requests are made to an endpoint (and dataset)
+# of the Sentry API for a while (see `breaker.CircuitBreaker`), 0 disables the circuit breakers.
+# A request only counts as failed once all its retries failed.
+# Requests slower than `BREAKER_SLOW_CALL_DURATION` seconds count as failed.
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("ZENTRY_BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("ZENTRY_BREAKER_RESET_TIMEOUT", 30))
+BREAKER_SLOW_CALL_DURATION = float(
+    os.environ.get("ZENTRY_BREAKER_SLOW_CALL_DURATION", 10)
+)
+
+# A JSON list of project pairs to monitor, see README.md
+PROJECT_PAIRS_CONFIG = os.environ.get("ZENTRY_PROJECT_PAIRS")
+
+# How many worker processes serve Zentry (see `app.py`). They share the Redis cache and the rate limit of the Sentry API.
+WORKERS = int(os.environ.get("ZENTRY_WORKERS", 1))
+
+# Max seconds one worker may take to fetch a result while the others wait for it
+LEASE_TIMEOUT = float(os.environ.get("ZENTRY_LEASE_TIMEOUT", 30))
+
+
+def _get_required_env(name):
+    value = os.environ.get(name)
+    if not value:
+        raise ValueError(
+            f"Please set the {name} environment variable. (See https://github.com/getsentry/zentry/blob/main/README.md)"
+        )
+
+    return value
+
+
+def _load_project_pairs():
+    """
+    Load the configured pairs of frontend and backend projects, by name.
+
+    Without `ZENTRY_PROJECT_PAIRS` there is one pair called "default",
+    configured by the `SENTRY_FRONTEND_*` and `SENTRY_BACKEND_*` environment variables.
+    """
+    if PROJECT_PAIRS_CONFIG:
+        pairs_config = json.loads(PROJECT_PAIRS_CONFIG)
+    else:
+        pairs_config = [
+            {
+                "name": "default",
+                "frontend_id": _get_required_env("SENTRY_FRONTEND_PROJECT_ID"),
+                "frontend_env": _get_required_env("SENTRY_FRONTEND_ENVIRONMENT"),
+                "backend_id": _get_required_env("SENTRY_BACKEND_PROJECT_ID"),
+                "backend_env": _get_required_env("SENTRY_BACKEND_ENVIRONMENT"),
+            }
+        ]
+
+    pairs = {}
+    for index, pair_config in enumerate(pairs_config):
+        pair = {
+            "name": pair_config["name"],
+            "frontend_id": str(pair_config["frontend_id"]),
+            "frontend_env": pair_config["frontend_env"],
+            "backend_id": str(pair_config["backend_id"]),
+            "backend_env": pair_config["backend_env"],
+            # Pairs with a lower priority are refreshed first (by default in order of the config)
+            "priority": pair_config.get("priority", index),
+        }
+        pairs[pair["name"]] = pair
+
+    return pairs
+
+
+API_AUTH_TOKEN = _get_required_env("SENTRY_API_AUTH_TOKEN")
+ORG_SLUG = _get_required_env("SENTRY_ORG_SLUG")
+
+PROJECT_PAIRS = _load_project_pairs()
+DEFAULT_PROJECT_PAIR = next(iter(PROJECT_PAIRS))
 
 
 org_data = None
-cache_backend = None
+redis_client = None
+client_session = None
+org_data_refresher = None
+snapshot_saver = None
+
+# The last known good results, see `_save_snapshot()`
+snapshot = Snapshot(SNAPSHOT_PATH)
+
+# Calls to the Sentry API that are currently in flight (by request key)
+inflight_requests = {}
+
+# Durations of the last requests to the Sentry API (by query name), see `_hedge_delay()`
+request_durations = {}
+
+# Collects the errors of failed API calls, see `track_failed_calls()`
+failed_calls = contextvars.ContextVar("failed_calls", default=None)
+
+# Collects the results served from the snapshot because the Sentry API failed, see `track_fallbacks()`
+fallbacks = contextvars.ContextVar("fallbacks", default=None)
+
+# Collects when the data used was fetched from the Sentry API, see `track_data_age()`
+data_fetched_at = contextvars.ContextVar("data_fetched_at", default=None)
+
+# Refreshes of stale results running in the background (by cache key)
+background_refreshes = {}
+
+# Results loaded in advance in the background, see `prefetch()`
+prefetches = {}
+
+# Results of the `get_*_status` functions, in front of the Redis cache
+result_cache = TTLCache(ttl=CACHE_EXPIRE_AFTER, maxsize=RESULT_CACHE_MAX_SIZE)
+metrics.register_cache("result", result_cache)
+
+# Rate limits of the Sentry API, by organization slug
+rate_limiters = {}
+
+# Circuit breakers of the Sentry API, by endpoint and dataset
+circuit_breakers = {}
+
+# Skips Redis for a while after it failed, see `call_redis()`
+redis_breaker = CircuitBreaker(
+    failure_threshold=1,
+    reset_timeout=REDIS_RETRY_INTERVAL,
+    slow_call_duration=float("inf"),
+)
+metrics.register_circuit_breaker("redis", redis_breaker)
+
+# Collects the calls made to the Sentry API, see `track_upstream_calls()`
+upstream_calls = contextvars.ContextVar("upstream_calls", default=None)
+
+# Name of the query currently being made, used for metrics
+query_name = contextvars.ContextVar("query_name", default="other")
+
+# Set while refreshing the cache, see `refreshing()`
+refresh_cache = contextvars.ContextVar("refresh_cache", default=False)
+
+# Until when (monotonic time) results may be fetched from the Sentry API, see `deadline()`
+deadline_at = contextvars.ContextVar("deadline_at", default=None)
+time_period_day = contextvars.ContextVar("time_period_day", default=None)
 
 
 async def init():
-    global cache_backend
-    cache_backend = RedisBackend(
-        cache_name="zentry_http_cache",
-        address=REDIS_URL,
-        expire_after=60 * 60,
-        allowed_codes=(200,),
-        allowed_methods=("GET",),
-        include_headers=True,
+    """
+    Set up the connection to Redis, load the snapshot and the organization data.
+
+    Called once on startup of the app.
+    """
+    get_redis()
+
+    try:
+        snapshot.load()
+        _restore_snapshot()
+    except Exception as e:
+        # Start without the snapshot, it is written again with new results
+        sentry_sdk.capture_exception(e)
+
+    global snapshot_saver
+    if snapshot_saver is None:
+        snapshot_saver = asyncio.create_task(_save_snapshot_periodically())
+
+    try:
+        await refresh_org_data()
+    except Exception as e:
+        # Do not prevent the app from starting, the data is loaded again on first use.
+        capture_exception(e)
+
+    global org_data_refresher
+    if org_data_refresher is None:
+        org_data_refresher = asyncio.create_task(_refresh_org_data_periodically())
+
+
+async def refresh_org_data():
+    """
+    Load the organization data of all project pairs concurrently.
+    """
+    global org_data
+    pair_names = list(PROJECT_PAIRS)
+    results = await asyncio.gather(
+        *[get_org_data(PROJECT_PAIRS[name]) for name in pair_names],
+        return_exceptions=True,
     )
 
+    new_org_data = dict(org_data or {})
+    for name, result in zip(pair_names, results):
+        # Keep the last known data of a pair that failed to load
+        if not isinstance(result, Exception):
+            new_org_data[name] = result
+            snapshot.set(_org_data_snapshot_key(name), result, time.time())
+
+    org_data = new_org_data
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+async def ensure_org_data(pair=None):
+    """
+    Return the organization data of a project pair, loading it if it is not available yet.
+
+    Only the requested pair is loaded, so a pair that fails to load does not affect the others.
+    """
     global org_data
-    org_data = await get_org_data()
+    pair = pair or DEFAULT_PROJECT_PAIR
+    if org_data is None or pair not in org_data:
+        data = await get_org_data(PROJECT_PAIRS[pair])
+        org_data = {**(org_data or {}), pair: data}
+        snapshot.set(_org_data_snapshot_key(pair), data, time.time())
+
+    return org_data[pair]
+
+
+async def _refresh_org_data_periodically():
+    while True:
+        await asyncio.sleep(ORG_DATA_REFRESH_INTERVAL)
+        try:
+            await refresh_org_data()
+        except Exception as e:
+            # Keep the last known organization data
+            capture_exception(e)
+
+
+def get_redis():
+    """
+    Return the process wide connection pool to Redis, where the results of queries are cached.
+    """
+    global redis_client
+    if redis_client is None:
+        redis_client = redis.asyncio.from_url(
+            REDIS_URL,
+            socket_timeout=REDIS_TIMEOUT,
+            socket_connect_timeout=REDIS_TIMEOUT,
+        )
+
+    return redis_client
+
+
+async def call_redis(func, *args, **kwargs):
+    """
+    Await `func(*args, **kwargs)`, a call to Redis, unless Redis is down.
+
+    After Redis failed to answer, it is skipped for `REDIS_RETRY_INTERVAL` seconds
+    (`CircuitOpenError` is raised), so not every call waits for the timeout.
+    Redis going down is reported to Sentry once, not for every failed call.
+    """
+    if not redis_breaker.allow():
+        raise CircuitOpenError("redis")
+
+    try:
+        result = await func(*args, **kwargs)
+    except REDIS_OUTAGE_ERRORS as e:
+        was_closed = redis_breaker.state == CLOSED
+        redis_breaker.record_failure()
+        metrics.errors.labels("redis").inc()
+        if was_closed:
+            sentry_sdk.capture_exception(e)
+        raise
+    except BaseException:
+        # Redis answered (with an error) or the call was cancelled
+        redis_breaker.record_cancelled()
+        raise
+
+    redis_breaker.record_success(0)
+    return result
+
+
+def report_redis_error(e):
+    # Outages of Redis are already reported by `call_redis()`
+    if not isinstance(e, REDIS_OUTAGE_ERRORS + (CircuitOpenError,)):
+        sentry_sdk.capture_exception(e)
+        metrics.errors.labels("redis").inc()
+
+
+def get_client_session():
+    """
+    Return the process wide HTTP session used for all calls to the Sentry API.
+
+    The session keeps connections to Sentry alive and caches DNS lookups,
+    so we do not pay for a new TCP/TLS handshake on every API call.
+    """
+    global client_session
+    if client_session is None or client_session.closed:
+        connector = TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        client_session = ClientSession(
+            connector=connector,
+            headers={"Authorization": f"Bearer {API_AUTH_TOKEN}"},
+            middlewares=(_rate_limit_middleware,),
+            # Without it a slow query could keep a request open for 5 minutes
+            timeout=ClientTimeout(sock_connect=HTTP_TIMEOUT, sock_read=HTTP_TIMEOUT),
+        )
+
+    return client_session
+
+
+def get_rate_limiter(org_slug):
+    """
+    Return the rate limiter shared by all requests for an organization.
+
+    Every worker process gets an equal share of the rate limit.
+    """
+    limiter = rate_limiters.get(org_slug)
+    if limiter is None:
+        limiter = TokenBucket(
+            rate=RATE_LIMIT_PER_SECOND / WORKERS,
+            capacity=max(1, RATE_LIMIT_BURST // WORKERS),
+        )
+        rate_limiters[org_slug] = limiter
+        metrics.register_rate_limiter(org_slug, limiter)
+
+    return limiter
+
+
+def get_circuit_breaker(name):
+    """
+    Return the circuit breaker shared by all requests to an endpoint (and dataset) of the Sentry API.
+    """
+    breaker = circuit_breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_TIMEOUT,
+            slow_call_duration=BREAKER_SLOW_CALL_DURATION,
+        )
+        circuit_breakers[name] = breaker
+        metrics.register_circuit_breaker(name, breaker)
+
+    return breaker
+
+
+def _circuit_breaker_name(url):
+    # One breaker per endpoint and dataset, so one failing dataset does not stop the others
+    parts = url.path.strip("/").split("/")
+    endpoint = "projects" if "projects" in parts else parts[-1]
+    dataset = url.query.get("dataset")
+    return f"{endpoint}:{dataset}" if dataset else endpoint
+
+
+def _org_slug_from_path(path):
+    # All endpoints we use look like `/organizations/{org_slug}/...` or `/projects/{org_slug}/...`
+    parts = path.strip("/").split("/")
+    for index, part in enumerate(parts[:-1]):
+        if part in ("organizations", "projects"):
+            return parts[index + 1]
+
+    return ORG_SLUG
+
+
+def _update_rate_limit(limiter, response):
+    """
+    Follow the rate limit headers Sentry sends with every response.
+    """
+    headers = response.headers
+    try:
+        remaining = headers.get("X-Sentry-Rate-Limit-Remaining")
+        reset = headers.get("X-Sentry-Rate-Limit-Reset")
+        if remaining is not None and reset is not None:
+            # The reset header is a unix timestamp
+            limiter.update(int(remaining), float(reset) - time.time())
+
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None and response.status == 429:
+            limiter.pause(float(retry_after))
+    except ValueError:
+        # Ignore malformed headers, the token bucket still limits our requests
+        pass
+
+
+def _retry_delay(attempt):
+    # Exponential backoff with full jitter, so retrying clients do not all come back at the same time
+    return random.uniform(0, HTTP_RETRY_BACKOFF * 2**attempt)
+
+
+async def _rate_limit_middleware(request, handler):
+    """
+    Wait for the rate limit of the organization before every request to the Sentry API,
+    and retry transient failures with exponential backoff.
+
+    While the circuit breaker of the endpoint is open, `CircuitOpenError` is raised
+    instead of making (or retrying) a request. The breaker counts one outcome per request,
+    that of its last attempt, so retries do not open it sooner.
+
+    The duration of every successful attempt is recorded, see `_record_duration()`.
+    """
+    limiter = get_rate_limiter(_org_slug_from_path(request.url.path))
+    breaker_name = _circuit_breaker_name(request.url)
+    breaker = get_circuit_breaker(breaker_name)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            metrics.circuit_breaker_rejections.labels(breaker_name).inc()
+            raise CircuitOpenError(breaker_name)
+
+        try:
+            await limiter.acquire()
+            start = time.perf_counter()
+            response = await handler(request)
+        except (ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= HTTP_RETRIES:
+                breaker.record_failure()
+                raise
+
+            breaker.record_cancelled()
+            metrics.sentry_api_retries.labels("connection").inc()
+        except BaseException:
+            # Cancelled, like the slower one of two hedged requests
+            breaker.record_cancelled()
+            raise
+        else:
+            retry = response.status in RETRY_STATUS_CODES and attempt < HTTP_RETRIES
+            if retry or response.status == 429:
+                # Rate limiting says nothing about whether the endpoint works,
+                # and the retry decides the outcome of the request
+                breaker.record_cancelled()
+            elif response.status >= 500:
+                breaker.record_failure()
+            else:
+                # Only the attempt itself, without waiting for the rate limit or earlier attempts
+                duration = time.perf_counter() - start
+                breaker.record_success(duration)
+                _record_duration(duration)
+
+            _update_rate_limit(limiter, response)
+            if not retry:
+                return response
+
+            metrics.sentry_api_retries.labels(str(response.status)).inc()
+            response.release()
+
+        # A 429 pauses the rate limiter (see `_update_rate_limit()`), so the retry waits at least that long.
+        await asyncio.sleep(_retry_delay(attempt))
+        attempt += 1
+
+
+async def close():
+    """
+    Stop background tasks, save the snapshot, close the HTTP session and the connection to Redis.
+
+    Called once on shutdown of the app.
+    """
+    global client_session, redis_client, org_data_refresher, snapshot_saver
+    if org_data_refresher is not None:
+        org_data_refresher.cancel()
+        org_data_refresher = None
+
+    if snapshot_saver is not None:
+        snapshot_saver.cancel()
+        snapshot_saver = None
+
+    await save_snapshot()
+
+    for task in list(background_refreshes.values()):
+        task.cancel()
+
+    if client_session is not None and not client_session.closed:
+        await client_session.close()
+
+    if redis_client is not None:
+        await redis_client.aclose()
+
+    client_session = None
+    redis_client = None
 
 
 def _get_time_period(preview_time_period):
+    day = time_period_day.get()
+    if day is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+    else:
+        now = datetime.datetime.combine(day, datetime.time(), datetime.timezone.utc)
+
     # We assume "now" is the end of the day today
     # Makes it way easier to cache results of the API calls
-    now = datetime.datetime.now(datetime.timezone.utc)
     now = now.replace(hour=0, minute=0, second=0, microsecond=0)
     now += datetime.timedelta(days=1, microseconds=-1)
 
@@ -82,8 +588,10 @@ def _get_time_period(preview_time_period):
 
 
 async def _make_api_request(path, params={}, preview_time_period=False):
+    """
+    Returns a tuple `(response, next_cursor)` with the cursor of the next page, if there is one.
+    """
     url = API_BASE_URL + path
-    headers = {"Authorization": f"Bearer {API_AUTH_TOKEN}"}
 
     start, end = _get_time_period(preview_time_period)
 
@@ -96,279 +604,1353 @@ async def _make_api_request(path, params={}, preview_time_period=False):
     combined_params.update(base_params)
     combined_params.update(params)
 
-    async with CachedSession(cache=cache_backend) as client:
-        async with client.get(url, headers=headers, params=combined_params) as response:
-            return await response.json()
+    response, fetched_at, next_cursor = await _single_flight(url, combined_params)
+    _record_fetched_at(fetched_at)
 
+    return response, next_cursor
 
-async def get_frontend_status(
-    org_slug, project_id, environment, preview_time_period=False
-):
-    response = await _make_api_request(
-        path=f"/organizations/{org_slug}/events/",
-        params={
-            "project": project_id,
-            "environment": environment,
-            "dataset": "metrics",
-            "query": 'transaction.op:[pageload,""] span.op:[ui.interaction.click,ui.interaction.hover,ui.interaction.drag,ui.interaction.press,""] !transaction:"<< unparameterized >>"',
-            "field": [
-                "p75(measurements.ttfb)",
-                "p75(measurements.fcp)",
-                "p75(measurements.inp)",
-                "performance_score(measurements.score.ttfb)",
-                "performance_score(measurements.score.fcp)",
-                "performance_score(measurements.score.inp)",
-            ],
-        },
-        preview_time_period=preview_time_period,
+
+def _record_fetched_at(fetched_at):
+    timestamps = data_fetched_at.get()
+    if timestamps is not None:
+        timestamps.append(fetched_at)
+
+
+def _refresh_in_background(key, get_status, kwargs):
+    # Only one refresh per result at a time, even if many viewers see the stale result
+    if key in background_refreshes:
+        return
+
+    async def refresh():
+        with refreshing():
+            try:
+                await get_status(**kwargs)
+            except Exception as e:
+                capture_exception(e)
+
+    # In a new context, so the refresh is not counted as part of the current request (see `track_*()`)
+    task = contextvars.Context().run(asyncio.create_task, refresh())
+    background_refreshes[key] = task
+    task.add_done_callback(lambda _: background_refreshes.pop(key, None))
+
+
+def prefetch(get_status, **kwargs):
+    """
+    Load a result into the caches in the background, so it is ready when it is asked for
+    (like the next page of a list).
+    """
+    key = (get_status.__name__, tuple(sorted(kwargs.items())))
+    if key in prefetches:
+        return
+
+    async def load():
+        try:
+            await get_status(**kwargs)
+        except Exception as e:
+            capture_exception(e)
+
+    # In a new context, so the result is not counted as part of the current request (see `track_*()`)
+    task = contextvars.Context().run(asyncio.create_task, load())
+    prefetches[key] = task
+    task.add_done_callback(lambda _: prefetches.pop(key, None))
+
+
+def _request_key(url, params):
+    # Normalize the params so the same request always results in the same key.
+    # The order of list values (like "field") is kept, it matters to the API.
+    normalized_params = []
+    for key, value in sorted(params.items()):
+        if isinstance(value, list):
+            value = tuple(value)
+        normalized_params.append((key, value))
+
+    return (url, tuple(normalized_params))
+
+
+def _next_cursor(response):
+    # Sentry sends the cursors of the previous and the next page in the Link header
+    link = response.links.get("next")
+    if link is None or link.get("results") != "true":
+        return None
+
+    return link.get("cursor")
+
+
+async def _fetch_json(url, params):
+    """
+    Returns a tuple `(data, fetched_at, next_cursor)` with the time the data was fetched
+    from the Sentry API and the cursor of the next page of results (or `None`).
+    """
+    client = get_client_session()
+    try:
+        async with client.get(url, params=params) as response:
+            # Do not try to read error responses (like rate limited requests) as data
+            response.raise_for_status()
+            data = await response.json()
+            next_cursor = _next_cursor(response)
+    except Exception:
+        metrics.errors.labels("sentry_api").inc()
+        raise
+
+    urls = upstream_calls.get()
+    if urls is not None:
+        urls.append(url)
+
+    return data, datetime.datetime.now(datetime.timezone.utc), next_cursor
+
+
+def _record_duration(duration):
+    # Used for the metrics and to know when to hedge a request (see `_hedge_delay()`)
+    metrics.sentry_api_duration.labels(query_name.get(), "sentry").observe(duration)
+    request_durations.setdefault(
+        query_name.get(), collections.deque(maxlen=HEDGE_SAMPLES)
+    ).append(duration)
+
+
+def _hedge_delay(name):
+    # Seconds after which a second request is sent, `None` if there are not enough recent requests to know
+    durations = request_durations.get(name)
+    if not HEDGE_PERCENTILE or durations is None or len(durations) < HEDGE_MIN_SAMPLES:
+        return None
+
+    durations = sorted(durations)
+    index = min(len(durations) - 1, int(len(durations) * HEDGE_PERCENTILE / 100))
+    return durations[index]
+
+
+async def _hedged_fetch_json(url, params):
+    """
+    Like `_fetch_json()`, but a slow request is sent a second time.
+
+    The second request is sent when the first one takes longer than most recent
+    requests of the same query. Whichever answers first wins, the other one is cancelled.
+    No second request is sent while we are being rate limited.
+    """
+    delay = _hedge_delay(query_name.get())
+    if delay is None:
+        return await _fetch_json(url, params)
+
+    first = asyncio.create_task(_fetch_json(url, params))
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        limiter = get_rate_limiter(_org_slug_from_path(url))
+        if done or limiter.throttled:
+            return await first
+
+        tasks.append(asyncio.create_task(_fetch_json(url, params)))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                # If one request fails, wait for the other one
+                if not task.cancelled() and task.exception() is None:
+                    winner = "original" if task is first else "hedge"
+                    metrics.sentry_api_hedged_requests.labels(winner).inc()
+                    return task.result()
+
+        # Both failed
+        return first.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _single_flight(url, params):
+    """
+    Make an API request, sharing it with identical requests already in flight.
+
+    Concurrent callers asking for the same data wait for the same upstream call
+    instead of all hitting the Sentry API.
+    """
+    key = _request_key(url, params)
+
+    task = inflight_requests.get(key)
+    if task is None:
+        task = asyncio.create_task(_hedged_fetch_json(url, params))
+        inflight_requests[key] = task
+        metrics.sentry_api_inflight.inc()
+
+        def _done(finished_task):
+            metrics.sentry_api_inflight.dec()
+            if inflight_requests.get(key) is finished_task:
+                del inflight_requests[key]
+
+        task.add_done_callback(_done)
+
+    # Shield the shared call, so one caller giving up does not cancel it for everyone.
+    return await asyncio.shield(task)
+
+
+@contextlib.contextmanager
+def track_failed_calls():
+    """
+    Collect the errors of all API calls failing within the block.
+
+    Used to find out if something was rendered from incomplete data.
+    """
+    errors = []
+    token = failed_calls.set(errors)
+    try:
+        yield errors
+    finally:
+        failed_calls.reset(token)
+
+
+@contextlib.contextmanager
+def track_fallbacks():
+    """
+    Collect the results used within the block that were served from the snapshot, because the Sentry API failed.
+    """
+    keys = []
+    token = fallbacks.set(keys)
+    try:
+        yield keys
+    finally:
+        fallbacks.reset(token)
+
+
+@contextlib.contextmanager
+def track_data_age():
+    """
+    Collect the times the data used within the block was fetched from the Sentry API.
+    """
+    timestamps = []
+    token = data_fetched_at.set(timestamps)
+    try:
+        yield timestamps
+    finally:
+        data_fetched_at.reset(token)
+
+
+@contextlib.contextmanager
+def track_upstream_calls():
+    """
+    Collect the URLs of all calls to the Sentry API made within the block.
+    """
+    urls = []
+    token = upstream_calls.set(urls)
+    try:
+        yield urls
+    finally:
+        upstream_calls.reset(token)
+
+
+def is_stale(fetched_at):
+    """
+    Data is stale if it is older than the time results are cached.
+    """
+    age = datetime.datetime.now(datetime.timezone.utc) - fetched_at
+    return age.total_seconds() > CACHE_EXPIRE_AFTER
+
+
+@contextlib.contextmanager
+def refreshing(day=None):
+    """
+    Fetch fresh data from the Sentry API within the block and update the cache with it.
+
+    If `day` is given, the time periods are calculated as if today was `day`.
+    Refreshing has no deadline, even when started while rendering a card.
+    """
+    refresh_token = refresh_cache.set(True)
+    day_token = time_period_day.set(day)
+    deadline_token = deadline_at.set(None)
+    try:
+        yield
+    finally:
+        deadline_at.reset(deadline_token)
+        time_period_day.reset(day_token)
+        refresh_cache.reset(refresh_token)
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised when a result was not fetched before the deadline, see `deadline()`.
+
+    Not a `TimeoutError`, so it can be told apart from requests to the Sentry API timing out.
+    """
+
+
+# Errors that are expected, and whose cause is reported on its own
+EXPECTED_ERRORS = (CircuitOpenError, DeadlineExceededError)
+
+
+def capture_exception(e):
+    """
+    Report an error of fetching data to Sentry, unless it is expected (see `EXPECTED_ERRORS`).
+
+    An open circuit breaker is not reported for every result it stops.
+    """
+    if not isinstance(e, EXPECTED_ERRORS):
+        sentry_sdk.capture_exception(e)
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """
+    Wait at most `seconds` seconds for results from the Sentry API within the block.
+
+    A result not fetched in time is replaced by the last known good result (see `cached_result()`),
+    or raises `DeadlineExceededError`. Its request goes on in the background and fills the caches.
+    """
+    token = deadline_at.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        deadline_at.reset(token)
+
+
+def _time_left():
+    # Seconds until the deadline, `None` without a deadline
+    at = deadline_at.get()
+    if at is None:
+        return None
+
+    return max(0, at - time.monotonic())
+
+
+def _report_error(task):
+    # Nobody waits for the task anymore, so its errors are only reported
+    if not task.cancelled() and task.exception() is not None:
+        capture_exception(task.exception())
+
+
+async def _within_deadline(task):
+    """
+    Wait for the task until the deadline (see `deadline()`).
+
+    After the deadline `DeadlineExceededError` is raised, but the task keeps running.
+    """
+    timeout = _time_left()
+    if timeout is None:
+        return await task
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        if task.done():
+            # The task itself failed, like a request to the Sentry API timing out
+            raise
+
+        metrics.deadline_exceeded.labels(query_name.get()).inc()
+        task.add_done_callback(_report_error)
+        raise DeadlineExceededError(query_name.get()) from None
+
+
+def _isolate_error(result):
+    # Report failed calls to Sentry but do not let them take down the other calls.
+    if isinstance(result, Exception):
+        capture_exception(result)
+        metrics.errors.labels("card_data").inc()
+
+        errors = failed_calls.get()
+        if errors is not None:
+            errors.append(result)
+
+        return None
+
+    return result
+
+
+async def gather_isolated(*calls):
+    """
+    Run independent API calls concurrently.
+
+    Returns the results in the order of the given calls,
+    a call that raised an exception returns `None`.
+    """
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    return [_isolate_error(result) for result in results]
+
+
+async def get_status_with_previous(get_status, **kwargs):
+    """
+    Load the data for the current and the previous time period concurrently.
+
+    Returns a tuple `(data, data_prev)`.
+    """
+    data, data_prev = await gather_isolated(
+        get_status(**kwargs),
+        get_status(preview_time_period=True, **kwargs),
     )
+    return data, data_prev
+
+
+def _redis_key(key):
+    func_name, org_slug, project_id, environment, (start, end) = key
+    # The referrer is part of the key (like it is part of the API calls), so a new referrer starts with an empty cache
+    return ":".join(
+        [
+            "zentry",
+            f"v{CACHE_FORMAT_VERSION}",
+            REFERRER,
+            func_name,
+            org_slug,
+            str(project_id),
+            environment,
+            start.isoformat(),
+            end.isoformat(),
+        ]
+    )
+
+
+def _lease(key, func):
+    # One lease per request to the Sentry API, all queries of a group (and page) are fetched together
+    name = "lease:" + ",".join(getattr(func, "query_group", (func.__name__,)))
+    _, _, cursor = key[0].partition("@")
+    if cursor:
+        name += "@" + cursor
+
+    return Lease(get_redis(), _redis_key((name,) + key[1:]), LEASE_TIMEOUT)
 
-    if len(response["data"]) == 0:
+
+async def _acquire_lease(key, func):
+    """
+    Take the lease for fetching a result, so other workers wait for it instead of calling the Sentry API as well.
+
+    Returns the lease, or `None` if another worker has it.
+    """
+    lease = _lease(key, func)
+    try:
+        if not await call_redis(lease.acquire):
+            return None
+    except Exception as e:
+        # Without Redis every worker fetches its own results
+        report_redis_error(e)
+
+    return lease
+
+
+async def _release_lease(lease):
+    try:
+        await call_redis(lease.release)
+    except Exception as e:
+        # The lease expires on its own
+        report_redis_error(e)
+
+
+async def _wait_for_lease(key, func):
+    """
+    Wait for the worker holding the lease of a result to fetch it.
+
+    Returns a tuple `(result, fetched_at)` from Redis, or `None` if no fresh result was stored in time.
+    """
+    timeout = LEASE_TIMEOUT
+    if _time_left() is not None:
+        timeout = min(timeout, _time_left())
+
+    try:
+        released = await call_redis(_lease(key, func).wait, timeout)
+    except Exception as e:
+        report_redis_error(e)
         return None
 
-    # Rename returned keys for better readability
-    rename_keys = {
-        "p75(measurements.ttfb)": "ttfb",
-        "p75(measurements.fcp)": "fcp",
-        "p75(measurements.inp)": "inp",
-        "performance_score(measurements.score.ttfb)": "ttfb_score",
-        "performance_score(measurements.score.fcp)": "fcp_score",
-        "performance_score(measurements.score.inp)": "inp_score",
-    }
+    item = await _read_result(key) if released else None
+    if item is None or is_stale(item[1]):
+        metrics.lease_waits.labels("timeout").inc()
+        return None
 
-    data = response["data"][0]
-    clean_data = {}
+    metrics.lease_waits.labels("shared").inc()
+    return item
 
-    for key in data.keys():
-        if key in rename_keys:
-            clean_data[rename_keys[key]] = data[key]
 
-    return clean_data
+def _encode_result(result, fetched_at):
+    data = json.dumps([fetched_at.timestamp(), result], separators=(",", ":")).encode()
+    if CACHE_COMPRESSION == "zlib" and len(data) >= CACHE_COMPRESS_MIN_SIZE:
+        # JSON never starts with "z", so compressed entries can be told apart
+        return b"z" + zlib.compress(data)
 
+    return data
 
-async def get_backend_status(
-    org_slug, project_id, environment, preview_time_period=False
-):
-    response = await _make_api_request(
-        path=f"/organizations/{org_slug}/events/",
-        params={
-            "project": project_id,
-            "environment": environment,
-            "dataset": "metrics",
-            "query": "event.type:transaction",
-            "field": [
-                "failure_rate()",
-                "apdex()",
-            ],
-        },
-        preview_time_period=preview_time_period,
+
+def _decode_result(raw):
+    if raw[:1] == b"z":
+        raw = zlib.decompress(raw[1:])
+
+    timestamp, result = json.loads(raw)
+    return result, datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+
+
+async def _read_result(key):
+    """
+    Returns a tuple `(result, fetched_at)` from the Redis cache, or `None` if it is not cached.
+    """
+    start = time.perf_counter()
+    try:
+        raw = await call_redis(get_redis().get, _redis_key(key))
+    except Exception as e:
+        # Without Redis the data is fetched from the Sentry API
+        report_redis_error(e)
+        return None
+
+    metrics.sentry_api_duration.labels(query_name.get(), "redis").observe(
+        time.perf_counter() - start
     )
 
-    if len(response["data"]) == 0:
+    if raw is None:
+        metrics.redis_cache_results["miss"] += 1
         return None
 
-    # Rename returned keys for better readability
-    rename_keys = {
-        "failure_rate()": "failure_rate",
-        "apdex()": "apdex",
-    }
+    return _decode_result(raw)
 
-    data = response["data"][0]
-    clean_data = {}
 
-    for key in data.keys():
-        if key in rename_keys:
-            clean_data[rename_keys[key]] = data[key]
+async def _write_result(key, result, fetched_at):
+    # Keep expired results around, so they can be served stale
+    age = datetime.datetime.now(datetime.timezone.utc) - fetched_at
+    expire = int(CACHE_EXPIRE_AFTER + CACHE_STALE_GRACE - age.total_seconds())
+    if expire <= 0:
+        return
 
-    return clean_data
+    try:
+        await call_redis(
+            get_redis().set,
+            _redis_key(key),
+            _encode_result(result, fetched_at),
+            ex=expire,
+        )
+    except Exception as e:
+        report_redis_error(e)
+
+
+def _remember_result(key, result, fetched_at):
+    # Only fresh results are kept in memory
+    age = datetime.datetime.now(datetime.timezone.utc) - fetched_at
+    ttl = CACHE_EXPIRE_AFTER - age.total_seconds()
+    if ttl > 0:
+        result_cache.set(key, (result, fetched_at), ttl=ttl)
+
+
+async def _store_result(key, result, fetched_at, preview_time_period):
+    _remember_result(key, result, fetched_at)
+    _save_snapshot(key, result, fetched_at, preview_time_period)
+    await _write_result(key, result, fetched_at)
+
+
+def _snapshot_key(key, preview_time_period):
+    # One entry per query and time period (not per day), so there always is a last known result.
+    # Like in Redis, a new referrer starts with an empty snapshot.
+    func_name, org_slug, project_id, environment, _ = key
+    period = "previous" if preview_time_period else "current"
+    return ":".join(
+        [
+            f"v{CACHE_FORMAT_VERSION}",
+            REFERRER,
+            func_name,
+            org_slug,
+            str(project_id),
+            environment,
+            period,
+        ]
+    )
 
 
-async def get_requests_status(
-    org_slug, project_id, environment, preview_time_period=False
-):
-    response = await _make_api_request(
-        path=f"/organizations/{org_slug}/events/",
-        params={
-            "project": project_id,
-            "environment": environment,
-            "dataset": "spansMetrics",
-            "query": "span.module:http span.op:http.client",
-            "field": [
-                "http_response_rate(3)",
-                "http_response_rate(4)",
-                "http_response_rate(5)",
-                "avg(span.self_time)",
-            ],
+def _org_data_snapshot_key(pair):
+    return ":".join(["org_data", REFERRER, ORG_SLUG, pair])
+
+
+def _save_snapshot(key, result, fetched_at, preview_time_period):
+    # Results fetched in advance (for tomorrow) are not the last known good result of today
+    day = time_period_day.get()
+    if day is not None and day != datetime.datetime.now(datetime.timezone.utc).date():
+        return
+
+    # Only the first page of a paginated result, so the snapshot does not grow with every page shown
+    if "@" in key[0]:
+        return
+
+    start, end = key[4]
+    snapshot.set(
+        _snapshot_key(key, preview_time_period),
+        {
+            "key": list(key[:4]),
+            "time_period": [start.isoformat(), end.isoformat()],
+            "result": result,
         },
-        preview_time_period=preview_time_period,
+        fetched_at.timestamp(),
     )
 
-    if len(response["data"]) == 0:
+
+def _load_snapshot(key, preview_time_period, any_time_period=False):
+    """
+    Returns a tuple `(result, fetched_at)` from the snapshot, or `None`.
+
+    Unless `any_time_period` is set, only a result for the same time period is returned,
+    if it is not too old to be served.
+    """
+    entry = snapshot.get(_snapshot_key(key, preview_time_period))
+    if entry is None:
         return None
 
+    value, updated_at = entry
+    fetched_at = datetime.datetime.fromtimestamp(updated_at, datetime.timezone.utc)
+    if not any_time_period:
+        start, end = key[4]
+        if value["time_period"] != [start.isoformat(), end.isoformat()]:
+            return None
+
+        age = datetime.datetime.now(datetime.timezone.utc) - fetched_at
+        if age.total_seconds() > CACHE_EXPIRE_AFTER + CACHE_STALE_GRACE:
+            return None
+
+    return value["result"], fetched_at
+
+
+def _restore_snapshot():
+    # Start with the last known organization data, in case the Sentry API is not available
+    global org_data
+    org_data = dict(org_data or {})
+    for name in PROJECT_PAIRS:
+        entry = snapshot.get(_org_data_snapshot_key(name))
+        if entry is not None and name not in org_data:
+            org_data[name] = entry[0]
+
+    # Fresh results of the snapshot are shown right after startup, without waiting for Redis
+    for preview_time_period in (False, True):
+        time_period = _get_time_period(preview_time_period)
+        start, end = time_period
+        for name in QUERIES:
+            for pair in PROJECT_PAIRS.values():
+                for project_id, environment in (
+                    (pair["frontend_id"], pair["frontend_env"]),
+                    (pair["backend_id"], pair["backend_env"]),
+                ):
+                    key = (
+                        f"get_{name}_status",
+                        ORG_SLUG,
+                        project_id,
+                        environment,
+                        time_period,
+                    )
+                    item = _load_snapshot(key, preview_time_period)
+                    if item is not None:
+                        _remember_result(key, *item)
+
+
+async def save_snapshot():
+    """
+    Save the results changed since the last call to the snapshot file.
+    """
+    try:
+        await asyncio.to_thread(snapshot.write, snapshot.changes())
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        metrics.errors.labels("snapshot").inc()
+
+
+async def _save_snapshot_periodically():
+    while True:
+        await asyncio.sleep(SNAPSHOT_SAVE_INTERVAL)
+        await save_snapshot()
+
+
+async def _fetch_result(
+    func, key, lease, org_slug, project_id, environment, preview_time_period, cursor
+):
+    """
+    Fetch a result from the Sentry API and store it in the caches.
+
+    Returns a tuple `(result, fetched_at)`.
+    """
+    try:
+        with track_data_age() as timestamps:
+            result = await func(
+                org_slug, project_id, environment, preview_time_period, cursor
+            )
+
+        fetched_at = min(timestamps, default=datetime.datetime.now(datetime.timezone.utc))
+        await _store_result(key, result, fetched_at, preview_time_period)
+    finally:
+        if lease is not None:
+            await _release_lease(lease)
+
+    return result, fetched_at
+
+
+def cached_result(func):
+    """
+    Cache the result of a `get_*_status` function in Redis and in memory.
+
+    Only the cleaned result is stored (as JSON, compressed if it is large), not the whole API response.
+    Stale results are served from Redis while they are refreshed in the background.
+    The in-memory cache only keeps fresh results.
+
+    The last known good result is also kept in the local snapshot. It is used when
+    Redis does not have the result, and when the Sentry API fails.
+
+    With several workers, only the worker holding the lease of a result (see `_acquire_lease()`)
+    fetches it from the Sentry API. The others wait for it and read it from Redis.
+
+    Every page of a paginated result (see `cursor`) is cached on its own, only the first page is kept in the snapshot.
+
+    Within a `deadline()`, a result that takes too long is fetched in the background,
+    and the last known good result is shown instead.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(
+        org_slug, project_id, environment, preview_time_period=False, cursor=None
+    ):
+        time_period = _get_time_period(preview_time_period)
+        name = func.__name__ if cursor is None else f"{func.__name__}@{cursor}"
+        key = (name, org_slug, project_id, environment, time_period)
+
+        # When refreshing, skip reading the caches
+        if not refresh_cache.get():
+            item = result_cache.get(key)
+            if item is not None:
+                result, fetched_at = item
+                _record_fetched_at(fetched_at)
+                return result
+
+        name_token = query_name.set(func.__name__)
+        try:
+            item = None
+            if not refresh_cache.get():
+                item = await _read_result(key)
+                if item is not None:
+                    stale = is_stale(item[1])
+                    metrics.redis_cache_results["stale" if stale else "hit"] += 1
+                else:
+                    # Redis is not available or does not have the result (anymore)
+                    item = _load_snapshot(key, preview_time_period)
+
+            lease = None
+            if item is None:
+                lease = await _acquire_lease(key, func)
+                if lease is None:
+                    # Another worker is fetching the result, use it when it is done
+                    item = await _wait_for_lease(key, func)
+                    if item is None:
+                        lease = await _acquire_lease(key, func)
+
+            if item is None:
+                fetch = asyncio.create_task(
+                    _fetch_result(
+                        func,
+                        key,
+                        lease,
+                        org_slug,
+                        project_id,
+                        environment,
+                        preview_time_period,
+                        cursor,
+                    )
+                )
+                try:
+                    result, fetched_at = await _within_deadline(fetch)
+                except Exception as e:
+                    # Show the last known good result rather than nothing
+                    item = _load_snapshot(key, preview_time_period, any_time_period=True)
+                    if item is None:
+                        raise
+
+                    capture_exception(e)
+                    keys = fallbacks.get()
+                    if keys is not None:
+                        keys.append(key)
+
+                    result, fetched_at = item
+            else:
+                result, fetched_at = item
+                _save_snapshot(key, result, fetched_at, preview_time_period)
+                if is_stale(fetched_at):
+                    _refresh_in_background(
+                        key,
+                        wrapper,
+                        {
+                            "org_slug": org_slug,
+                            "project_id": project_id,
+                            "environment": environment,
+                            "preview_time_period": preview_time_period,
+                            "cursor": cursor,
+                        },
+                    )
+
+                _remember_result(key, result, fetched_at)
+        finally:
+            query_name.reset(name_token)
+
+        _record_fetched_at(fetched_at)
+
+        return result
+
+    return wrapper
+
+
+# The queries of the dashboard cards, by name.
+#
+# - "dataset", "query": what data to query
+# - "fields": the fields to fetch, mapped to the names they get in the result
+# - "extra_fields": fields needed by the query (for grouping or sorting) that are not part of the result
+# - "sort", "per_page": order and number of rows returned
+# - "all_rows": return all rows, instead of only the first one
+# - "paginate": return one page of rows, as `{"rows": [...], "next_cursor": ...}`.
+#   The next page is fetched by passing `next_cursor` as `cursor` to the `get_*_status` function.
+# - "daily": fetch the data per day and combine the days locally (see `_fetch_daily_group()`).
+#   The result also contains the value of every day, as "trends". Percentiles and scores
+#   can not be combined, they are fetched for the whole time period (see `WINDOW_FUNCTIONS`).
+QUERIES = {
+    "frontend": {
+        "dataset": "metrics",
+        "daily": True,
+        "query": 'transaction.op:[pageload,""] span.op:[ui.interaction.click,ui.interaction.hover,ui.interaction.drag,ui.interaction.press,""] !transaction:"<< unparameterized >>"',
+        "fields": {
+            "p75(measurements.ttfb)": "ttfb",
+            "p75(measurements.fcp)": "fcp",
+            "p75(measurements.inp)": "inp",
+            "performance_score(measurements.score.ttfb)": "ttfb_score",
+            "performance_score(measurements.score.fcp)": "fcp_score",
+            "performance_score(measurements.score.inp)": "inp_score",
+        },
+    },
+    "backend": {
+        "dataset": "metrics",
+        "daily": True,
+        "query": "event.type:transaction",
+        "fields": {
+            "failure_rate()": "failure_rate",
+            "apdex()": "apdex",
+        },
+    },
+    "requests": {
+        "dataset": "spansMetrics",
+        "daily": True,
+        "query": "span.module:http span.op:http.client",
+        "fields": {
+            "http_response_rate(3)": "response_rate_3xx",
+            "http_response_rate(4)": "response_rate_4xx",
+            "http_response_rate(5)": "response_rate_5xx",
+            "avg(span.self_time)": "time_avg",
+        },
+    },
+    "caches": {
+        "dataset": "spansMetrics",
+        "query": "span.op:[cache.get_item,cache.get]",
+        "fields": {
+            "cache_miss_rate()": "miss_rate",
+        },
+    },
+    # The transactions spending the most time in caches, only loaded when the breakdown is opened
+    "caches_breakdown": {
+        "dataset": "spansMetrics",
+        "query": "span.op:[cache.get_item,cache.get]",
+        "fields": {
+            "transaction": "transaction",
+            "cache_miss_rate()": "miss_rate",
+        },
+        "extra_fields": ["time_spent_percentage()"],
+        "sort": "-time_spent_percentage()",
+        "per_page": 5,
+        "all_rows": True,
+    },
+    "queues": {
+        "dataset": "spansMetrics",
+        "query": "span.op:[queue.process,queue.publish]",
+        "fields": {
+            "avg_if(span.duration,span.op,queue.process)": "processing_time_avg",
+            "avg(messaging.message.receive.latency)": "time_in_queue_avg",
+        },
+    },
+    # The transactions spending the most time in queues, only loaded when the breakdown is opened
+    "queues_breakdown": {
+        "dataset": "spansMetrics",
+        "query": "span.op:[queue.process,queue.publish]",
+        "fields": {
+            "transaction": "transaction",
+            "avg_if(span.duration,span.op,queue.process)": "processing_time_avg",
+            "avg(messaging.message.receive.latency)": "time_in_queue_avg",
+        },
+        "extra_fields": ["time_spent_percentage(app,span.duration)"],
+        "sort": "-time_spent_percentage(app,span.duration)",
+        "per_page": 5,
+        "all_rows": True,
+    },
+    "database": {
+        "dataset": "spansMetrics",
+        "query": "span.module:db has:span.description",
+        "fields": {
+            "span.description": "query",
+            "avg(span.self_time)": "time_avg",
+            "sum(span.self_time)": "time_total",
+            "time_spent_percentage()": "time_percentage",
+        },
+        "sort": "-time_spent_percentage()",
+        "per_page": 5,
+        "all_rows": True,
+        "paginate": True,
+    },
+}
+
+
+def _merge_key(name):
+    query = QUERIES[name]
+    # More fields would change the rows of grouped, sorted or paginated queries, so they are never merged
+    if query.get("extra_fields") or query.get("sort") or query.get("per_page"):
+        return name
+
+    # Queries returning one row of aggregates over the same data can be fetched with one request
+    return (query.get("daily", False), query["dataset"], query["query"])
+
+
+def plan_queries(names):
+    """
+    Group queries into as few requests to the Sentry API as possible.
+
+    Returns a list of groups (lists of query names). All queries of a group are
+    fetched with one request. Every query is only part of one group, even if it is given more than once.
+    """
+    groups = {}
+    for name in names:
+        group = groups.setdefault(_merge_key(name), [])
+        if name not in group:
+            group.append(name)
+
+    return list(groups.values())
+
+
+# The group of every query, if all queries are planned together
+QUERY_GROUPS = {name: group for group in plan_queries(QUERIES) for name in group}
+
+
+def _clean_row(query, row):
     # Rename returned keys for better readability
-    rename_keys = {
-        "http_response_rate(3)": "response_rate_3xx",
-        "http_response_rate(4)": "response_rate_4xx",
-        "http_response_rate(5)": "response_rate_5xx",
-        "avg(span.self_time)": "time_avg",
+    return {
+        new_key: row[key] for key, new_key in query["fields"].items() if key in row
     }
 
-    data = response["data"][0]
-    clean_data = {}
 
-    for key in data.keys():
-        if key in rename_keys:
-            clean_data[rename_keys[key]] = data[key]
+async def fetch_queries(
+    names, org_slug, project_id, environment, preview_time_period=False, cursor=None
+):
+    """
+    Fetch the results of queries, merging them into as few requests as possible.
+
+    Returns a dict with the result of every query, by name.
+    A query without any data has the result `None`.
+    The `cursor` selects the page of paginated queries.
+    """
+    groups = plan_queries(names)
+    group_results = await asyncio.gather(
+        *[
+            _fetch_query_group(
+                group, org_slug, project_id, environment, preview_time_period, cursor
+            )
+            for group in groups
+        ]
+    )
+
+    results = {}
+    for group_result in group_results:
+        results.update(group_result)
+
+    return results
 
-    return clean_data
 
+def _group_fields(group):
+    # All queries of a group have the same dataset, query, sort and number of rows
+    fields = list(QUERIES[group[0]].get("extra_fields", []))
+    for name in group:
+        fields += [field for field in QUERIES[name]["fields"] if field not in fields]
 
-async def get_caches_status(
-    org_slug, project_id, environment, preview_time_period=False
+    return fields
+
+
+async def _fetch_query_group(
+    group, org_slug, project_id, environment, preview_time_period, cursor=None
 ):
-    response = await _make_api_request(
+    """
+    Returns a dict with the result of every query of the group, by name.
+    """
+    query = QUERIES[group[0]]
+    if query.get("daily"):
+        return await _fetch_daily_group(
+            group, org_slug, project_id, environment, preview_time_period
+        )
+
+    params = {
+        "project": project_id,
+        "environment": environment,
+        "dataset": query["dataset"],
+        "query": query["query"],
+        "field": _group_fields(group),
+    }
+    if "per_page" in query:
+        params["per_page"] = query["per_page"]
+    if "sort" in query:
+        params["sort"] = query["sort"]
+    if query.get("paginate") and cursor is not None:
+        params["cursor"] = cursor
+
+    response, next_cursor = await _make_api_request(
         path=f"/organizations/{org_slug}/events/",
-        params={
-            "project": project_id,
-            "environment": environment,
-            "dataset": "spansMetrics",
-            "per_page": 5,
-            "query": "span.op:[cache.get_item,cache.get]",
-            "field": [
-                "project",
-                "project.id",
-                "transaction",
-                "cache_miss_rate()",
-                "sum(span.self_time)",
-                "avg(cache.item_size)",
-                "time_spent_percentage()",
-            ],
-            "sort": "-time_spent_percentage()",
-        },
+        params=params,
         preview_time_period=preview_time_period,
     )
 
-    if len(response["data"]) == 0:
+    results = {}
+    for name in group:
+        query = QUERIES[name]
+        if len(response["data"]) == 0:
+            results[name] = None
+        elif query.get("paginate"):
+            results[name] = {
+                "rows": [_clean_row(query, row) for row in response["data"]],
+                "next_cursor": next_cursor,
+            }
+        elif query.get("all_rows"):
+            results[name] = [_clean_row(query, row) for row in response["data"]]
+        else:
+            results[name] = _clean_row(query, response["data"][0])
+
+    return results
+
+
+def _days_key(group, org_slug, project_id, environment):
+    return ":".join(
+        [
+            "zentry",
+            f"v{CACHE_FORMAT_VERSION}",
+            REFERRER,
+            "days",
+            "+".join(group),
+            org_slug,
+            str(project_id),
+            environment,
+        ]
+    )
+
+
+def _is_day_complete(day, fetched_at):
+    # Data of a day does not change anymore if it was fetched long enough after the day ended
+    day_end = datetime.datetime.combine(
+        day + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc
+    )
+    return fetched_at >= day_end + datetime.timedelta(seconds=DAY_SETTLE_DELAY)
+
+
+# Functions whose value for several days can not be computed from their values of every day
+WINDOW_FUNCTIONS = (
+    "p50(",
+    "p75(",
+    "p90(",
+    "p95(",
+    "p99(",
+    "percentile(",
+    "performance_score(",
+)
+
+
+def _combine(field, values, counts):
+    """
+    Combine the values of a field for several days into one value for all of them.
+
+    Not for fields of `WINDOW_FUNCTIONS`.
+    """
+    values = [
+        (value, count)
+        for value, count in zip(values, counts)
+        if value is not None and count
+    ]
+    if not values:
         return None
 
-    # Rename returned keys for better readability
-    rename_keys = {
-        "cache_miss_rate()": "miss_rate",
-        "sum(span.self_time)": "time_total",
-        "avg(cache.item_size)": "time_avg",
-    }
+    if field.startswith(("count(", "sum(")):
+        return sum(value for value, _ in values)
 
-    data = response["data"][0]
-    clean_data = {}
+    # Averages and rates are weighted by the number of events of each day
+    total = sum(count for _, count in values)
+    return sum(value * count for value, count in values) / total
 
-    for key in data.keys():
-        if key in rename_keys:
-            clean_data[rename_keys[key]] = data[key]
 
-    return clean_data
+async def _load_days(group, org_slug, project_id, environment, days):
+    """
+    Returns the stored values of the given days as a dict `{day: (values, fetched_at)}`.
+    """
+    try:
+        stored = await call_redis(
+            get_redis().hmget,
+            _days_key(group, org_slug, project_id, environment),
+            [day.isoformat() for day in days],
+        )
+    except Exception as e:
+        # Without Redis all days are fetched from the Sentry API
+        report_redis_error(e)
+        return {}
 
+    return {
+        day: _decode_result(raw) for day, raw in zip(days, stored) if raw is not None
+    }
 
-async def get_queues_status(
-    org_slug, project_id, environment, preview_time_period=False
-):
-    response = await _make_api_request(
-        path=f"/organizations/{org_slug}/events/",
+
+async def _store_days(group, org_slug, project_id, environment, days, first_day):
+    """
+    Store the values of the given days, and remove the days before `first_day`
+    (they are not part of the time periods anymore).
+    """
+    key = _days_key(group, org_slug, project_id, environment)
+    client = get_redis()
+
+    async def store():
+        await client.hset(
+            key,
+            mapping={
+                day.isoformat(): _encode_result(values, fetched_at)
+                for day, (values, fetched_at) in days.items()
+            },
+        )
+        # Days are stored as ISO dates, so they sort like the days themselves
+        old_days = [
+            day
+            for day in await client.hkeys(key)
+            if day.decode() < first_day.isoformat()
+        ]
+        if old_days:
+            await client.hdel(key, *old_days)
+
+        # Both time periods, plus some days for the day changing
+        await client.expire(key, (2 * TIME_PERIOD_IN_DAYS + 2) * 24 * 60 * 60)
+
+    try:
+        await call_redis(store)
+    except Exception as e:
+        report_redis_error(e)
+
+
+async def _fetch_days(group, org_slug, project_id, environment, first_day, last_day):
+    """
+    Fetch the values of all fields of a group of queries for every day from `first_day` to `last_day`.
+    """
+    query = QUERIES[group[0]]
+    start = datetime.datetime.combine(first_day, datetime.time(), datetime.timezone.utc)
+    end = datetime.datetime.combine(
+        last_day + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc
+    )
+
+    # The number of events is needed to combine the days
+    fields = ["count()"] + _group_fields(group)
+    response, _ = await _make_api_request(
+        path=f"/organizations/{org_slug}/events-stats/",
         params={
             "project": project_id,
             "environment": environment,
-            "dataset": "spansMetrics",
-            "per_page": 5,
-            "query": "span.op:[queue.process,queue.publish]",
-            "field": [
-                "avg_if(span.duration,span.op,queue.process)",
-                "avg(messaging.message.receive.latency)",
-                "trace_status_rate(ok)",
-                "time_spent_percentage(app,span.duration)",
-            ],
-            "sort": "-time_spent_percentage(app,span.duration)",
+            "dataset": query["dataset"],
+            "query": query["query"],
+            "yAxis": fields,
+            "interval": "1d",
+            "start": start.isoformat(),
+            "end": (end - datetime.timedelta(microseconds=1)).isoformat(),
         },
-        preview_time_period=preview_time_period,
     )
+    fetched_at = datetime.datetime.now(datetime.timezone.utc)
 
-    if len(response["data"]) == 0:
-        return None
-
-    # Rename returned keys for better readability
-    rename_keys = {
-        "avg_if(span.duration,span.op,queue.process)": "processing_time_avg",
-        "avg(messaging.message.receive.latency)": "time_in_queue_avg",
-        "trace_status_rate(ok)": "success_rate",
-        "time_spent_percentage(app,span.duration)": "time_percentage",
-    }
+    days = {}
+    day = first_day
+    while day <= last_day:
+        days[day] = ({}, fetched_at)
+        day += datetime.timedelta(days=1)
 
-    data = response["data"][0]
-    clean_data = {}
+    # With more than one field, the series of every field are returned by field
+    for field in fields:
+        for timestamp, values in response[field]["data"]:
+            day = datetime.datetime.fromtimestamp(
+                timestamp, datetime.timezone.utc
+            ).date()
+            if day in days:
+                days[day][0][field] = values[0]["count"] if values else None
 
-    for key in data.keys():
-        if key in rename_keys:
-            clean_data[rename_keys[key]] = data[key]
+    return days
 
-    return clean_data
 
-
-async def get_database_status(
-    org_slug, project_id, environment, preview_time_period=False
+async def _fetch_window(
+    group, org_slug, project_id, environment, preview_time_period, fields
 ):
-    response = await _make_api_request(
+    """
+    Fetch the values of the given fields of a group of queries for the whole time period.
+    """
+    query = QUERIES[group[0]]
+    response, _ = await _make_api_request(
         path=f"/organizations/{org_slug}/events/",
         params={
             "project": project_id,
             "environment": environment,
-            "dataset": "spansMetrics",
-            "per_page": 5,
-            "query": "span.module:db has:span.description",
-            "field": [
-                "span.description",
-                "avg(span.self_time)",
-                "sum(span.self_time)",
-                "time_spent_percentage()",
-            ],
-            "sort": "-time_spent_percentage()",
+            "dataset": query["dataset"],
+            "query": query["query"],
+            "field": fields,
         },
         preview_time_period=preview_time_period,
     )
 
-    if len(response["data"]) == 0:
-        return None
+    return response["data"][0] if response["data"] else {}
 
-    # Rename returned keys for better readability
-    data = response["data"]
-    clean_data = []
 
-    for item in data:
-        clean_data.append(
-            {
-                "query": item["span.description"],
-                "time_avg": item["avg(span.self_time)"],
-                "time_total": item["sum(span.self_time)"],
-                "time_percentage": item["time_spent_percentage()"],
-            }
+async def _fetch_daily_group(
+    group, org_slug, project_id, environment, preview_time_period
+):
+    """
+    Load the values of every day of both time periods, fetching only the days not stored yet.
+
+    Days stored in Redis are reused until the time period moves on. Only the
+    days that are still changing (today and maybe yesterday) are fetched again,
+    when they are stale or while refreshing. Fields of `WINDOW_FUNCTIONS` are
+    fetched for the whole time period with one more request.
+    """
+    _, end = _get_time_period(preview_time_period=False)
+    all_days = [
+        end.date() - datetime.timedelta(days=days_ago)
+        for days_ago in reversed(range(2 * TIME_PERIOD_IN_DAYS))
+    ]
+
+    days = await _load_days(group, org_slug, project_id, environment, all_days)
+
+    missing = []
+    for day in all_days:
+        if day in days:
+            values, fetched_at = days[day]
+            if _is_day_complete(day, fetched_at):
+                continue
+            if not refresh_cache.get() and not is_stale(fetched_at):
+                continue
+
+        missing.append(day)
+
+    if missing:
+        # One request for all missing days. Both time periods ask for the same days, so they share the request.
+        fetched = await _fetch_days(
+            group, org_slug, project_id, environment, missing[0], missing[-1]
+        )
+        # While fetching the days of tomorrow in advance (see `refreshing()`), today still needs its first day
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        first_day = min(
+            all_days[0], today - datetime.timedelta(days=2 * TIME_PERIOD_IN_DAYS - 1)
+        )
+        await _store_days(
+            group, org_slug, project_id, environment, fetched, first_day
+        )
+        days.update(fetched)
+
+    if preview_time_period:
+        window = all_days[:TIME_PERIOD_IN_DAYS]
+    else:
+        window = all_days[TIME_PERIOD_IN_DAYS:]
+
+    # The age of the data is the age of the oldest day that could still change
+    for day in window:
+        values, fetched_at = days[day]
+        if not _is_day_complete(day, fetched_at):
+            _record_fetched_at(fetched_at)
+
+    counts = [days[day][0].get("count()") for day in window]
+
+    window_fields = [
+        field
+        for field in _group_fields(group)
+        if field.startswith(WINDOW_FUNCTIONS)
+    ]
+    window_values = {}
+    if window_fields and any(counts):
+        window_values = await _fetch_window(
+            group, org_slug, project_id, environment, preview_time_period, window_fields
         )
 
-    return clean_data
+    results = {}
+    for name in group:
+        query = QUERIES[name]
+        if not any(counts):
+            results[name] = None
+            continue
 
+        result = {}
+        trends = {}
+        for field, new_key in query["fields"].items():
+            values = [days[day][0].get(field) for day in window]
+            if field.startswith(WINDOW_FUNCTIONS):
+                result[new_key] = window_values.get(field)
+            else:
+                result[new_key] = _combine(field, values, counts)
+            trends[new_key] = values
 
-async def get_project_data(org_slug, project_id):
+        result["trends"] = trends
+        results[name] = result
+
+    return results
+
+
+def _status_function(name):
+    """
+    Build the cached `get_<name>_status` function of a query.
+
+    The other queries fetched with the same request are cached as well,
+    so loading their cards does not call the Sentry API again.
+    """
+    group = QUERY_GROUPS[name]
+
+    async def get_status(
+        org_slug, project_id, environment, preview_time_period=False, cursor=None
+    ):
+        with track_data_age() as timestamps:
+            results = await fetch_queries(
+                group, org_slug, project_id, environment, preview_time_period, cursor
+            )
+
+        # Pass the age of the data on to the caller, see `_fetch_result()`
+        for timestamp in timestamps:
+            _record_fetched_at(timestamp)
+
+        time_period = _get_time_period(preview_time_period)
+        fetched_at = min(timestamps, default=datetime.datetime.now(datetime.timezone.utc))
+        for other_name in group:
+            if other_name != name:
+                other_func_name = f"get_{other_name}_status"
+                key = (
+                    other_func_name if cursor is None else f"{other_func_name}@{cursor}",
+                    org_slug,
+                    project_id,
+                    environment,
+                    time_period,
+                )
+                await _store_result(
+                    key, results[other_name], fetched_at, preview_time_period
+                )
+
+        return results[name]
+
+    get_status.__name__ = get_status.__qualname__ = f"get_{name}_status"
+    # Used by the refresher to refresh every group of queries only once
+    get_status.query_group = tuple(group)
+
+    return cached_result(get_status)
+
+
+get_frontend_status = _status_function("frontend")
+get_backend_status = _status_function("backend")
+get_requests_status = _status_function("requests")
+get_caches_status = _status_function("caches")
+get_queues_status = _status_function("queues")
+get_caches_breakdown_status = _status_function("caches_breakdown")
+get_queues_breakdown_status = _status_function("queues_breakdown")
+get_database_status = _status_function("database")
+
+
+# Cached like the queries, so with several workers only one of them fetches the project data
+@cached_result
+async def get_project_data(
+    org_slug, project_id, environment, preview_time_period=False, cursor=None
+):
     path = f"/projects/{org_slug}/{project_id}/"
     url = API_BASE_URL + path
-    headers = {"Authorization": f"Bearer {API_AUTH_TOKEN}"}
 
-    async with CachedSession(cache=cache_backend) as client:
-        async with client.get(url, headers=headers) as response:
-            project_data = await response.json()
+    project_data, _, _ = await _single_flight(url, {})
 
     return project_data
 
 
-async def get_org_data():
-    frontend_project_data = await get_project_data(ORG_SLUG, FRONTEND_ID)
-    backend_project_data = await get_project_data(ORG_SLUG, BACKEND_ID)
+async def get_org_data(pair):
+    frontend_project_data, backend_project_data = await asyncio.gather(
+        get_project_data(ORG_SLUG, pair["frontend_id"], pair["frontend_env"]),
+        get_project_data(ORG_SLUG, pair["backend_id"], pair["backend_env"]),
+    )
 
     if (
         frontend_project_data["organization"]["name"]
@@ -380,11 +1962,14 @@ async def get_org_data():
 
     data = {
         "name": org_name,
-        "frontend_id": FRONTEND_ID,
+        "pair": pair["name"],
+        "frontend_id": pair["frontend_id"],
+        "frontend_env": pair["frontend_env"],
         "frontend_url": frontend_project_data["organization"]["links"][
             "organizationUrl"
         ],
-        "backend_id": BACKEND_ID,
+        "backend_id": pair["backend_id"],
+        "backend_env": pair["backend_env"],
         "backend_url": backend_project_data["organization"]["links"]["organizationUrl"],
     }
 
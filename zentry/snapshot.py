@@ -0,0 +1,91 @@
+import json
+import sqlite3
+
+
+class Snapshot:
+    """
+    The last known good value of every key, kept in memory and saved to a local SQLite file.
+
+    The file survives restarts and does not depend on any server, so its values
+    can be shown even when Redis and the Sentry API are not available.
+    Without a `path` the values are only kept in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot (key TEXT PRIMARY KEY, value TEXT, updated_at REAL)"
+        )
+        return connection
+
+    def load(self):
+        """
+        Load all values from the file.
+        """
+        if not self.path:
+            return
+
+        connection = self._connect()
+        try:
+            rows = connection.execute("SELECT key, value, updated_at FROM snapshot")
+            for key, value, updated_at in rows:
+                self._entries[key] = (json.loads(value), updated_at)
+        finally:
+            connection.close()
+
+    def get(self, key):
+        """
+        Returns a tuple `(value, updated_at)`, or `None` if there is no value.
+        """
+        return self._entries.get(key)
+
+    def set(self, key, value, updated_at):
+        """
+        Remember a value, unless a newer one is already known.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] >= updated_at:
+            return
+
+        self._entries[key] = (value, updated_at)
+        self._dirty.add(key)
+
+    def changes(self):
+        """
+        Returns the values changed since the last call, as rows for `write()`.
+        """
+        rows = [
+            (key, json.dumps(self._entries[key][0]), self._entries[key][1])
+            for key in self._dirty
+        ]
+        self._dirty = set()
+        return rows
+
+    def write(self, rows):
+        """
+        Save the given rows to the file. Blocks, so run it in a thread.
+
+        Several processes can share the file, a value is only replaced by a newer one.
+        """
+        if not self.path or not rows:
+            return
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO snapshot (key, value, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at "
+                    "WHERE excluded.updated_at > snapshot.updated_at",
+                    rows,
+                )
+        finally:
+            connection.close()